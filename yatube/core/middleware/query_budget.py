@@ -0,0 +1,94 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('yatube.sql')
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем позволяет бюджет."""
+
+
+class QueryRecorder:
+    """Собирает запросы к базе за время обработки одного запроса."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[IN_LIST_RE.sub('IN (...)', sql)] += 1
+
+    def repeated(self, threshold):
+        """Отпечатки запросов, повторённых не меньше threshold раз."""
+        return {
+            sql: total
+            for sql, total in self.fingerprints.items()
+            if total >= threshold
+        }
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL-запросы каждого запроса и ищет признаки N+1.
+
+    В режиме DEBUG статистика уходит в заголовки ответа, иначе -
+    в структурированный лог yatube.sql. Бюджеты задаются в
+    SQL_QUERY_BUDGETS по имени представления (например, posts:index).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        self.report(request, response, recorder)
+
+        return response
+
+    def report(self, request, response, recorder):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        repeated = recorder.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+        budget = settings.SQL_QUERY_BUDGETS.get(view_name)
+        over_budget = budget is not None and recorder.count > budget
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time-Ms'] = f'{recorder.duration * 1000:.2f}'
+            response['X-Query-Repeated'] = str(len(repeated))
+        if over_budget or repeated or not settings.DEBUG:
+            level = logging.INFO
+            if over_budget or repeated:
+                level = logging.WARNING
+            logger.log(level, json.dumps({
+                'path': request.path,
+                'view': view_name,
+                'queries': recorder.count,
+                'time_ms': round(recorder.duration * 1000, 2),
+                'budget': budget,
+                'repeated': repeated,
+            }, ensure_ascii=False))
+        if over_budget and settings.SQL_QUERY_BUDGET_ENFORCE:
+            raise QueryBudgetExceeded(
+                f'{view_name}: {recorder.count} запросов при бюджете {budget}'
+            )
@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from .middleware.query_budget import QueryBudgetExceeded, QueryRecorder
 
 
 User = get_user_model()
@@ -28,3 +32,47 @@ class PostsTests(TestCase):
         """500 использует кастомный шаблон."""
         response = self.guest.get('/servererror/')
         self.assertTemplateUsed(response, 'core/500.html')
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    def setUp(self):
+        self.guest = Client()
+        cache.clear()
+
+    @override_settings(DEBUG=True)
+    def test_debug_headers(self):
+        """В режиме DEBUG статистика запросов попадает в заголовки."""
+        response = self.guest.get(reverse('posts:index'))
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        self.assertIn('X-Query-Time-Ms', response)
+        self.assertEqual(response['X-Query-Repeated'], '0')
+
+    def test_no_headers_in_production(self):
+        """Без DEBUG заголовки со статистикой не отдаются."""
+        with self.assertLogs('yatube.sql', level='INFO'):
+            response = self.guest.get(reverse('posts:index'))
+        self.assertNotIn('X-Query-Count', response)
+
+    @override_settings(
+        SQL_QUERY_BUDGETS={'posts:index': 0},
+        SQL_QUERY_BUDGET_ENFORCE=True
+    )
+    def test_budget_enforced(self):
+        """Превышение бюджета запросов приводит к ошибке."""
+        with self.assertLogs('yatube.sql', level='WARNING'):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.guest.get(reverse('posts:index'))
+
+    def test_repeated_queries_detected(self):
+        """Повторяющиеся запросы с разными параметрами считаются N+1."""
+        recorder = QueryRecorder()
+        sql = 'SELECT * FROM auth_user WHERE id = %s'
+        for pk in range(5):
+            recorder(lambda *args: None, sql, (pk,), False, {})
+        recorder(
+            lambda *args: None,
+            'SELECT * FROM posts_post WHERE id IN (%s, %s)',
+            (1, 2), False, {}
+        )
+        self.assertEqual(recorder.count, 6)
+        self.assertEqual(recorder.repeated(5), {sql: 5})
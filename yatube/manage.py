@@ -5,7 +5,11 @@ import sys
 
 
 def main():
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    settings_module = 'yatube.settings'
+    if sys.argv[1:2] == ['test']:
+        # У тестов свои настройки, см. yatube/settings_test.py.
+        settings_module = 'yatube.settings_test'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
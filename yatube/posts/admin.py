@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
-from .models import Post, Group, Comment
+from .exporter import iter_ndjson, iter_post_records
+from .models import Post, Group, Comment, Task
+from .search import matching_post_ids, to_match_query
 
 
 @admin.register(Post)
@@ -18,6 +21,29 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = ('export_ndjson',)
+
+    def export_ndjson(self, request, queryset):
+        """Отдаёт выбранные посты файлом NDJSON по мере чтения из базы."""
+        response = StreamingHttpResponse(
+            iter_ndjson(iter_post_records(queryset)),
+            content_type='application/x-ndjson; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="posts.ndjson"'
+        )
+
+        return response
+
+    export_ndjson.short_description = 'Выгрузить в NDJSON'
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по полнотекстовому индексу вместо LIKE по тексту."""
+        match = to_match_query(search_term)
+        if not match:
+            return queryset, False
+
+        return queryset.filter(pk__in=matching_post_ids(match)), False
 
 
 @admin.register(Group)
@@ -44,3 +70,19 @@ class CommentAdmin(admin.ModelAdmin):
     )
     list_editable = ('text',)
     list_filter = ('created',)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """Модель для просмотра фоновых задач в админке."""
+
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_after',
+        'finished',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('last_error',)
@@ -0,0 +1,237 @@
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_safe
+
+from . import constants
+from .models import Comment, Group, Post, User
+from .pagination import CursorPaginator, InvalidCursor
+from .storage import post_image_storage
+from .timeline import TimelinePaginator, get_following_posts
+
+# Только колонки, которые попадают в ответ: строки читаются через
+# values() без создания объектов моделей.
+POST_FIELDS = (
+    'pk',
+    'text',
+    'pub_date',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__slug',
+    'image',
+    'comment_count',
+)
+COMMENT_FIELDS = (
+    'pk',
+    'text',
+    'created',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+)
+GROUP_FIELDS = ('pk', 'slug', 'title', 'description')
+PROFILE_FIELDS = (
+    'username',
+    'first_name',
+    'last_name',
+    'stats__post_count',
+    'stats__follower_count',
+    'stats__following_count',
+)
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+def api_view(view):
+    """Представление API: только чтение, gzip и ошибки в JSON."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return _json({'detail': 'Не найдено.'}, status=404)
+        except InvalidCursor:
+            return _json(
+                {'detail': 'Курсор не подходит этому списку.'},
+                status=400
+            )
+
+    return require_safe(gzip_page(wrapper))
+
+
+def _full_name(row, prefix='author__'):
+    return f'{row[prefix + "first_name"]} {row[prefix + "last_name"]}'.strip()
+
+
+def serialize_post(row):
+    """Словарь поста для ответа из строки values(POST_FIELDS)."""
+    image = row['image']
+
+    return {
+        'id': row['pk'],
+        'text': row['text'],
+        'pub_date': row['pub_date'].isoformat(),
+        'author': row['author__username'],
+        'author_name': _full_name(row),
+        'group': row['group__slug'],
+        'image': post_image_storage.url(image) if image else None,
+        'comment_count': row['comment_count'],
+    }
+
+
+def serialize_comment(row):
+    """Словарь комментария из строки values(COMMENT_FIELDS)."""
+    return {
+        'id': row['pk'],
+        'text': row['text'],
+        'created': row['created'].isoformat(),
+        'author': row['author__username'],
+        'author_name': _full_name(row),
+    }
+
+
+def serialize_group(row):
+    """Словарь группы из строки values(GROUP_FIELDS)."""
+    return {
+        'slug': row['slug'],
+        'title': row['title'],
+        'description': row['description'],
+    }
+
+
+def serialize_profile(row):
+    """Словарь профиля из строки values(PROFILE_FIELDS)."""
+    return {
+        'username': row['username'],
+        'name': _full_name(row, prefix=''),
+        'post_count': row['stats__post_count'] or 0,
+        'follower_count': row['stats__follower_count'] or 0,
+        'following_count': row['stats__following_count'] or 0,
+    }
+
+
+def _get_row(queryset, fields):
+    row = queryset.values(*fields).first()
+    if row is None:
+        raise Http404
+
+    return row
+
+
+def _page(request, paginator, serialize):
+    """Ответ со страницей, начинающейся с курсора из ?cursor=."""
+    page = paginator.get_cursor_page(request.GET.get('cursor'), strict=True)
+
+    return _json({
+        'results': [serialize(row) for row in page],
+        'next': page.cursor.next,
+        'previous': page.cursor.previous,
+    })
+
+
+def _posts_page(request, queryset):
+    paginator = CursorPaginator(
+        queryset.values(*POST_FIELDS),
+        constants.API_PAGE_SIZE
+    )
+
+    return _page(request, paginator, serialize_post)
+
+
+@api_view
+def posts(request):
+    """Лента всех постов."""
+    return _posts_page(request, Post.objects.all())
+
+
+@api_view
+def follow(request):
+    """Лента постов авторов, на которых подписан пользователь."""
+    if not request.user.is_authenticated:
+        return _json({'detail': 'Нужна авторизация.'}, status=401)
+    paginator = TimelinePaginator(
+        get_following_posts(request.user),
+        constants.API_PAGE_SIZE,
+        user=request.user,
+        fields=POST_FIELDS
+    )
+
+    return _page(request, paginator, serialize_post)
+
+
+@api_view
+def post_detail(request, post_id):
+    """Отдельный пост."""
+    row = _get_row(
+        Post.objects.filter(pk=post_id),
+        POST_FIELDS + ('group__title',)
+    )
+    data = serialize_post(row)
+    data['group_title'] = row['group__title']
+
+    return _json(data)
+
+
+@api_view
+def post_comments(request, post_id):
+    """Комментарии поста, новые первыми."""
+    _get_row(Post.objects.filter(pk=post_id), ('pk',))
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS),
+        constants.API_PAGE_SIZE,
+        order_field='created'
+    )
+
+    return _page(request, paginator, serialize_comment)
+
+
+@api_view
+def groups(request):
+    """Все группы, новые первыми."""
+    paginator = CursorPaginator(
+        Group.objects.order_by('pk').values(*GROUP_FIELDS),
+        constants.API_PAGE_SIZE,
+        order_field='pk'
+    )
+
+    return _page(request, paginator, serialize_group)
+
+
+@api_view
+def group_detail(request, slug):
+    """Группа."""
+    return _json(serialize_group(
+        _get_row(Group.objects.filter(slug=slug), GROUP_FIELDS)
+    ))
+
+
+@api_view
+def group_posts(request, slug):
+    """Посты группы."""
+    group = _get_row(Group.objects.filter(slug=slug), ('pk',))
+
+    return _posts_page(request, Post.objects.filter(group_id=group['pk']))
+
+
+@api_view
+def profile(request, username):
+    """Профиль автора со счётчиками."""
+    return _json(serialize_profile(
+        _get_row(User.objects.filter(username=username), PROFILE_FIELDS)
+    ))
+
+
+@api_view
+def profile_posts(request, username):
+    """Посты автора."""
+    author = _get_row(User.objects.filter(username=username), ('pk',))
+
+    return _posts_page(request, Post.objects.filter(author_id=author['pk']))
@@ -0,0 +1,23 @@
+from django.urls import path
+
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', api.posts, name='posts'),
+    path('posts/<int:post_id>/', api.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/comments/',
+         api.post_comments,
+         name='post_comments'
+         ),
+    path('follow/', api.follow, name='follow'),
+    path('groups/', api.groups, name='groups'),
+    path('groups/<slug:slug>/', api.group_detail, name='group_detail'),
+    path('groups/<slug:slug>/posts/', api.group_posts, name='group_posts'),
+    path('profiles/<str:username>/', api.profile, name='profile'),
+    path('profiles/<str:username>/posts/',
+         api.profile_posts,
+         name='profile_posts'
+         ),
+]
@@ -0,0 +1,205 @@
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.db.models import Count
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+
+from . import constants
+from .feed_cache import bump_versions, get_watermark
+from .models import Group, User
+
+# Область PageStamp с версией индексов подсказок.
+SCOPE = 'autocomplete'
+
+# Символ больше любого символа ключа: диапазон [prefix, prefix + END)
+# содержит ровно ключи, начинающиеся с prefix.
+END = '\U0010ffff'
+
+_lock = threading.Lock()
+_state = {
+    'index': None,
+    'version': None,
+    'built_at': 0.0,
+    'stamp': None,
+    'checked_at': None,
+}
+
+
+def normalize(text):
+    """Ключ для сравнения: без регистра и диакритики."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+
+    return ''.join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+
+
+class PrefixIndex:
+    """Отсортированный массив ключей для поиска по префиксу.
+
+    Для коротких префиксов, чьи диапазоны самые длинные, лучшие
+    записи посчитаны заранее. Для остальных поиск - два бинарных
+    поиска по массиву и выбор самых весомых записей из диапазона.
+    """
+
+    def __init__(self, entries, limit=constants.AUTOCOMPLETE_LIMIT):
+        self.entries = sorted(entries, key=itemgetter(0))
+        self.keys = [entry[0] for entry in self.entries]
+        self.limit = limit
+        self.top = {}
+        for length in range(1, constants.AUTOCOMPLETE_TOP_PREFIX_LENGTH + 1):
+            groups = groupby(self.entries, key=lambda e: e[0][:length])
+            for prefix, group in groups:
+                # Ключи короче length уже учтены на своей длине.
+                if len(prefix) == length:
+                    self.top[prefix] = heapq.nlargest(
+                        limit,
+                        group,
+                        key=itemgetter(1)
+                    )
+
+    def search(self, prefix, limit):
+        """Не больше limit записей с ключом на prefix, тяжёлые первыми."""
+        if prefix in self.top and limit <= self.limit:
+            top = self.top[prefix][:limit]
+        else:
+            start = bisect_left(self.keys, prefix)
+            end = bisect_left(self.keys, prefix + END, start)
+            top = heapq.nlargest(
+                limit,
+                islice(self.entries, start, end),
+                key=itemgetter(1)
+            )
+
+        return [entry[2] for entry in top]
+
+
+def user_entry(username, first_name, last_name, followers):
+    """Запись индекса пользователей."""
+    return (
+        normalize(username),
+        followers,
+        {
+            'username': username,
+            'full_name': f'{first_name} {last_name}'.strip(),
+        },
+    )
+
+
+def build_indexes():
+    """Строит индексы пользователей и групп одним проходом по базе."""
+    users = User.objects.filter(
+        is_active=True
+    ).annotate(
+        followers=Coalesce('stats__follower_count', 0)
+    ).values_list(
+        'username',
+        'first_name',
+        'last_name',
+        'followers'
+    )
+    groups = Group.objects.annotate(
+        post_total=Count('posts')
+    ).values_list(
+        'slug',
+        'title',
+        'post_total'
+    )
+
+    return {
+        'users': PrefixIndex(
+            user_entry(*user) for user in users.iterator()
+        ),
+        'groups': PrefixIndex(
+            (
+                normalize(slug),
+                post_total,
+                {
+                    'slug': slug,
+                    'title': title,
+                },
+            )
+            for slug, title, post_total in groups.iterator()
+        ),
+    }
+
+
+def _is_stale(version):
+    age = time.monotonic() - _state['built_at']
+
+    return (
+        _state['index'] is None
+        or _state['version'] != version
+        or age > constants.AUTOCOMPLETE_MAX_AGE_SECONDS
+    )
+
+
+def _read_version():
+    """Версия индексов из базы, не чаще раза в несколько секунд."""
+    now = time.monotonic()
+    checked_at = _state['checked_at']
+    if (
+        checked_at is None
+        or now - checked_at >= constants.AUTOCOMPLETE_VERSION_CHECK_SECONDS
+    ):
+        _state['stamp'] = get_watermark(SCOPE)
+        _state['checked_at'] = now
+
+    return _state['stamp']
+
+
+def get_indexes():
+    """Индексы текущего процесса, перестроенные после изменений.
+
+    Версия хранится в отметке PageStamp в базе, общей для всех
+    процессов, и перечитывается раз в
+    AUTOCOMPLETE_VERSION_CHECK_SECONDS. Раз в
+    AUTOCOMPLETE_MAX_AGE_SECONDS индекс перестраивается ради
+    свежих весов. Пока один поток перестраивает индекс, остальные
+    отвечают по прежнему; ждут только запросы до первой постройки.
+    """
+    version = _read_version()
+    if _is_stale(version):
+        if _lock.acquire(blocking=_state['index'] is None):
+            try:
+                if _is_stale(version):
+                    _state['index'] = build_indexes()
+                    _state['version'] = version
+                    _state['built_at'] = time.monotonic()
+            finally:
+                _lock.release()
+
+    return _state['index']
+
+
+def invalidate_indexes():
+    """Помечает индексы всех процессов устаревшими."""
+    bump_versions(SCOPE)
+    # Этот процесс перечитает версию сразу, остальные - по таймеру.
+    _state['checked_at'] = None
+
+
+def suggest(query, limit=constants.AUTOCOMPLETE_LIMIT):
+    """Подсказки пользователей и групп для начала ввода query."""
+    prefix = normalize(query.strip())
+    if not prefix:
+        return {'users': [], 'groups': []}
+
+    indexes = get_indexes()
+
+    return {
+        'users': [
+            {**user, 'url': reverse('posts:profile', args=[user['username']])}
+            for user in indexes['users'].search(prefix, limit)
+        ],
+        'groups': [
+            {**group, 'url': reverse('posts:group_list', args=[group['slug']])}
+            for group in indexes['groups'].search(prefix, limit)
+        ],
+    }
@@ -1,5 +1,54 @@
 POSTS_PER_PAGE = 10
 POSTS_PER_SECOND_PAGE = 3
+COMMENTS_PER_PAGE = 20
 SYMBOLS_IN_SELF_TEXT = 30
 SYMBOLS_IN_STR = 15
-CASH_TIME_FOR_INDEX_PAGE_IN_SECONDS = 60 / 3
+CASH_TIME_FOR_INDEX_PAGE_IN_SECONDS = 60 * 5
+TIMELINE_BATCH_SIZE = 1000
+PULLED_AUTHORS_CACHE_SECONDS = 60
+COUNTERS_CHUNK_SIZE = 1000
+THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+IMAGE_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_MAX_DIMENSION = 2048
+IMAGE_JPEG_QUALITY = 85
+IMAGE_WEBP_QUALITY = 80
+THUMBNAIL_FORMATS = ('JPEG', 'WEBP')
+THUMBNAIL_MAX_AGE = 60 * 60 * 24 * 365
+THUMBNAIL_DISK_CACHE_LOW_WATER = 0.8
+SEARCH_MAX_TERMS = 10
+SEARCH_SNIPPET_TOKENS = 16
+SEARCH_COMMENT_WEIGHT = 0.5
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_TOP_PREFIX_LENGTH = 3
+AUTOCOMPLETE_MAX_AGE_SECONDS = 60 * 5
+AUTOCOMPLETE_VERSION_CHECK_SECONDS = 5
+AUTOCOMPLETE_CLIENT_CACHE_SECONDS = 60
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY_SECONDS = 10
+TASK_LEASE_SECONDS = 60 * 5
+TASK_KEEP_FINISHED_SECONDS = 60 * 60 * 24 * 7
+TASK_POLL_SECONDS = 1
+IMPORT_BATCH_SIZE = 1000
+IMPORT_CHUNK_SIZE = 10000
+# Наибольшая длина id записи в источнике импорта.
+IMPORT_SOURCE_ID_MAX_LENGTH = 64
+EXPORT_CHUNK_SIZE = 2000
+FEED_ITEMS = 20
+FEED_TITLE_WORDS = 10
+FEED_CACHE_SECONDS = 60 * 15
+API_PAGE_SIZE = 20
+SEED_BATCH_SIZE = 5000
+SEED_CHUNK_SIZE = 50000
+SEED_VOCABULARY_SIZE = 3000
+SEED_NAMES_POOL_SIZE = 500
+SEED_POWER_LAW_EXPONENT = 1.1
+SEED_GROUP_SHARE = 0.7
+SEED_DAYS = 365
+LOADTEST_SAMPLE_SIZE = 1000
+TEMPLATE_BENCH_CARDS = (1, 10, 50)
+TEMPLATE_BENCH_ROUNDS = 5
+TEMPLATE_BENCH_MIN_ROUND_SECONDS = 0.2
+TEMPLATE_BENCH_THRESHOLD = 0.1
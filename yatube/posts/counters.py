@@ -0,0 +1,116 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from . import constants
+from .models import AuthorStats, Comment, Follow, Post, User
+
+
+def _shifted(field, delta):
+    """Выражение F(field) + delta, не уходящее ниже нуля."""
+    return Greatest(F(field) + delta, 0)
+
+
+def _bump_stats(user_id, field, delta):
+    """Атомарно меняет счётчик пользователя на delta.
+
+    Недостающая строка счётчиков создаётся только при увеличении:
+    уменьшение приходит и при каскадном удалении пользователя, и
+    созданная заново строка ссылалась бы на удалённого пользователя.
+    """
+    updated = AuthorStats.objects.filter(user_id=user_id).update(
+        **{field: _shifted(field, delta)}
+    )
+    if not updated and delta > 0:
+        AuthorStats.objects.get_or_create(user_id=user_id)
+        AuthorStats.objects.filter(user_id=user_id).update(
+            **{field: _shifted(field, delta)}
+        )
+
+
+def post_added(post, delta=1):
+    """Учитывает создание (или удаление при delta=-1) поста."""
+    _bump_stats(post.author_id, 'post_count', delta)
+
+
+def comment_added(comment, delta=1):
+    """Учитывает создание (или удаление при delta=-1) комментария."""
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=_shifted('comment_count', delta)
+    )
+
+
+def follow_added(follow, delta=1):
+    """Учитывает создание (или удаление при delta=-1) подписки."""
+    _bump_stats(follow.author_id, 'follower_count', delta)
+    _bump_stats(follow.user_id, 'following_count', delta)
+
+
+def _count_subquery(queryset, field):
+    """Подзапрос с количеством строк queryset для OuterRef('pk')."""
+    counts = queryset.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+
+    return Coalesce(
+        Subquery(counts, output_field=IntegerField()),
+        0
+    )
+
+
+def _chunks(queryset, chunk_size):
+    """Диапазоны первичных ключей queryset по chunk_size строк."""
+    last_pk = 0
+    while True:
+        pks = list(queryset.filter(pk__gt=last_pk).order_by(
+            'pk'
+        ).values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            break
+        yield pks[0], pks[-1]
+        last_pk = pks[-1]
+
+
+def reconcile_counters(chunk_size=constants.COUNTERS_CHUNK_SIZE):
+    """Пересчитывает все счётчики по исходным таблицам.
+
+    Работает пачками по диапазонам первичных ключей, чтобы не держать
+    долгих блокировок на больших таблицах. Вернёт число обработанных
+    пользователей и постов.
+    """
+    users = 0
+    for first_pk, last_pk in _chunks(User.objects.all(), chunk_size):
+        chunk = User.objects.filter(pk__range=(first_pk, last_pk))
+        AuthorStats.objects.bulk_create(
+            (AuthorStats(user_id=pk) for pk in chunk.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True)),
+            ignore_conflicts=True
+        )
+        stats = chunk.annotate(
+            posts_total=_count_subquery(Post.objects.all(), 'author'),
+            followers_total=_count_subquery(Follow.objects.all(), 'author'),
+            following_total=_count_subquery(Follow.objects.all(), 'user'),
+        ).values_list(
+            'pk', 'posts_total', 'followers_total', 'following_total'
+        )
+        rows = [
+            AuthorStats(
+                user_id=pk,
+                post_count=posts_total,
+                follower_count=followers_total,
+                following_count=following_total,
+            )
+            for pk, posts_total, followers_total, following_total in stats
+        ]
+        AuthorStats.objects.bulk_update(
+            rows,
+            ('post_count', 'follower_count', 'following_count')
+        )
+        users += len(rows)
+    posts = 0
+    for first_pk, last_pk in _chunks(Post.objects.all(), chunk_size):
+        posts += Post.objects.filter(pk__range=(first_pk, last_pk)).update(
+            comment_count=_count_subquery(Comment.objects.all(), 'post')
+        )
+
+    return users, posts
@@ -0,0 +1,52 @@
+import json
+
+from . import constants
+from .models import Post
+
+EXPORT_FIELDS = (
+    'pk',
+    'text',
+    'pub_date',
+    'author__username',
+    'group__slug',
+    'group__title',
+    'comment_count',
+)
+
+
+def iter_post_records(queryset=None, since=None,
+                      chunk_size=constants.EXPORT_CHUNK_SIZE):
+    """Записи экспорта постов, читаемые пачками по первичному ключу.
+
+    В памяти одновременно держится не больше chunk_size строк, а
+    каждая пачка - диапазон по индексу без OFFSET. Формат записей
+    совместим с import_yatube.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    if since is not None:
+        queryset = queryset.filter(pub_date__gte=since)
+    queryset = queryset.order_by('pk').values_list(*EXPORT_FIELDS)
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not rows:
+            break
+        for pk, text, pub_date, author, group, group_title, comments in rows:
+            yield {
+                'type': 'post',
+                'id': pk,
+                'author': author,
+                'group': group,
+                'group_title': group_title,
+                'text': text,
+                'pub_date': pub_date.isoformat(),
+                'comment_count': comments,
+            }
+        last_pk = rows[-1][0]
+
+
+def iter_ndjson(records):
+    """Строки NDJSON для записей экспорта."""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
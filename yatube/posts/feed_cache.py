@@ -0,0 +1,41 @@
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from .models import PageStamp
+
+# Область, от которой зависят все страницы: группы, имена
+# пользователей и массовые изменения в обход сигналов.
+SITE = 'site'
+
+
+def get_watermark(*scopes):
+    """Сумма версий областей и время последнего изменения любой из них.
+
+    Область - это строка вида feed, post:1 или author:2. Отметки
+    читаются одним запросом из базы, а не из кэша процесса, поэтому
+    все процессы отдают одинаковые валидаторы. Сумма версий растёт
+    при каждом изменении; у областей без отметок время - None.
+    """
+    stamp = PageStamp.objects.filter(scope__in=scopes).aggregate(
+        version=Sum('version'),
+        modified=Max('modified')
+    )
+
+    return stamp['version'] or 0, stamp['modified']
+
+
+def bump_versions(*scopes):
+    """Отмечает изменение областей: новая версия и время изменения."""
+    now = timezone.now()
+    scopes = set(scopes)
+    bump = {'version': F('version') + 1, 'modified': now}
+    stamps = PageStamp.objects.filter(scope__in=scopes)
+    if stamps.update(**bump) < len(scopes):
+        # Отметку могли создать параллельно: тогда строка уже есть,
+        # и повторное обновление всё равно сдвинет её версию.
+        missing = scopes - set(stamps.values_list('scope', flat=True))
+        PageStamp.objects.bulk_create(
+            [PageStamp(scope=scope, modified=now) for scope in missing],
+            ignore_conflicts=True
+        )
+        PageStamp.objects.filter(scope__in=missing).update(**bump)
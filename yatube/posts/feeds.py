@@ -0,0 +1,145 @@
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from . import constants
+from .models import Group, Post, User
+
+
+class CachedPostsFeed(Feed):
+    """Лента постов, чьё готовое тело хранится в кэше.
+
+    Ключ кэша включает только дату последнего поста ленты, поэтому
+    повторный опрос без новых постов стоит один запрос к базе и не
+    строит XML заново, а изменения в других лентах его не сбрасывают.
+    Правки старых постов попадают в ленту не позже, чем через
+    FEED_CACHE_SECONDS.
+    """
+
+    def get_queryset(self, obj):
+        """Все посты ленты, новые первыми; по умолчанию - посты сайта."""
+        return Post.objects.select_related('author', 'group')
+
+    def items(self, obj):
+        return self.get_queryset(obj)[:constants.FEED_ITEMS]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(constants.FEED_TITLE_WORDS)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def __call__(self, request, *args, **kwargs):
+        try:
+            obj = self.get_object(request, *args, **kwargs)
+        except ObjectDoesNotExist:
+            raise Http404('Лента не найдена.')
+        latest = self.get_queryset(obj).values_list(
+            'pub_date',
+            flat=True
+        ).first()
+        key = ':'.join((
+            'posts:feed',
+            self.feed_type.__name__,
+            request.path,
+            str(latest.timestamp() if latest else 0),
+        ))
+        cached = cache.get(key)
+        if cached is None:
+            feed = self.get_feed(obj, request)
+            cached = (feed.content_type, feed.writeString('utf-8'))
+            cache.set(key, cached, constants.FEED_CACHE_SECONDS)
+        content_type, content = cached
+        response = HttpResponse(content, content_type=content_type)
+        if latest:
+            response['Last-Modified'] = http_date(latest.timestamp())
+
+        return response
+
+
+class LatestPostsFeed(CachedPostsFeed):
+    """RSS последних постов сайта."""
+
+    title = 'Yatube: последние обновления'
+    description = 'Последние посты на Yatube.'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupPostsFeed(CachedPostsFeed):
+    """RSS постов группы."""
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=[obj.slug])
+
+    def get_queryset(self, obj):
+        return obj.posts.select_related('author').all()
+
+
+class ProfilePostsFeed(CachedPostsFeed):
+    """RSS постов автора."""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: посты {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Посты автора {obj.username} на Yatube.'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def get_queryset(self, obj):
+        return obj.posts.select_related('author', 'group')
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    """Atom последних постов сайта."""
+
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    """Atom постов группы."""
+
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class ProfilePostsAtomFeed(ProfilePostsFeed):
+    """Atom постов автора."""
+
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
@@ -1,5 +1,7 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
+from .images import check_image, ingest_image
 from .models import Post, Comment
 
 
@@ -11,6 +13,15 @@ class PostForm(ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        """Проверяет новую картинку и заменяет её нормализованной."""
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            check_image(image)
+            image = ingest_image(image)
+
+        return image
+
 
 class CommentForm(ModelForm):
     """Форма Comment для создания формы для работы с моделью User"""
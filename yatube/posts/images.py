@@ -0,0 +1,149 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.exceptions import SuspiciousFileOperation, ValidationError
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import constants
+from .models import ImageBlob, Post
+from .storage import post_image_storage
+
+logger = logging.getLogger(__name__)
+
+
+def check_image(upload):
+    """Проверяет размер файла и число пикселей до полного декодирования.
+
+    Image.open читает только заголовок, поэтому проверка не тратит
+    память на «бомбы» с огромным разрешением.
+    """
+    if upload.size > constants.IMAGE_MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)d МБ.',
+            params={'limit': constants.IMAGE_MAX_BYTES // (1024 * 1024)},
+            code='image_too_large',
+        )
+    upload.seek(0)
+    with Image.open(upload) as image:
+        width, height = image.size
+    upload.seek(0)
+    if width * height > constants.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка больше %(limit)d мегапикселей.',
+            params={'limit': constants.IMAGE_MAX_PIXELS // 1_000_000},
+            code='image_too_many_pixels',
+        )
+
+
+def _flatten(image):
+    """Приводит картинку к RGB, подкладывая белый фон под прозрачность."""
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+
+    return image.convert('RGB')
+
+
+def ingest_image(upload):
+    """Нормализует загруженную картинку поста.
+
+    Поворачивает по EXIF, уменьшает до IMAGE_MAX_DIMENSION по большей
+    стороне и возвращает ContentFile с JPEG для хранения как оригинал.
+    WebP браузерам отдаёт posts:thumbnail.
+    """
+    max_size = (constants.IMAGE_MAX_DIMENSION, constants.IMAGE_MAX_DIMENSION)
+    upload.seek(0)
+    with Image.open(upload) as source:
+        # Для JPEG draft декодирует сразу в уменьшенном масштабе.
+        source.draft('RGB', max_size)
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail(max_size, Image.LANCZOS)
+        image = _flatten(image)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+
+    jpeg = BytesIO()
+    image.save(
+        jpeg,
+        'JPEG',
+        quality=constants.IMAGE_JPEG_QUALITY,
+        optimize=True,
+        progressive=True
+    )
+
+    return ContentFile(jpeg.getvalue(), name=f'{stem}.jpg')
+
+
+def render_thumbnail(name, size, image_format):
+    """Создаёт миниатюру размера size из THUMBNAIL_SIZES в байтах.
+
+    Параметр crop означает обрезку по центру до точного размера,
+    без него картинка только вписывается в размер.
+    """
+    geometry, options = constants.THUMBNAIL_SIZES[size]
+    box = tuple(int(side) for side in geometry.split('x'))
+    with post_image_storage.open(name) as file, Image.open(file) as source:
+        source.draft('RGB', box)
+        image = ImageOps.exif_transpose(source)
+        if options.get('crop'):
+            image = ImageOps.fit(image, box, Image.LANCZOS)
+        else:
+            image.thumbnail(box, Image.LANCZOS)
+        image = _flatten(image)
+    output = BytesIO()
+    if image_format == 'WEBP':
+        image.save(output, 'WEBP', quality=constants.IMAGE_WEBP_QUALITY)
+    else:
+        image.save(
+            output,
+            'JPEG',
+            quality=constants.IMAGE_JPEG_QUALITY,
+            optimize=True
+        )
+
+    return output.getvalue()
+
+
+def lock_image(name):
+    """Блокирует файл name до конца текущей транзакции.
+
+    Блокировку берёт UPDATE строки ImageBlob: так она работает и в
+    SQLite, где select_for_update ничего не делает.
+    """
+    now = timezone.now()
+    if not ImageBlob.objects.filter(name=name).update(used=now):
+        ImageBlob.objects.get_or_create(name=name, defaults={'used': now})
+        ImageBlob.objects.filter(name=name).update(used=now)
+
+
+def release_image(name):
+    """Удаляет файл картинки и его миниатюры, когда на него нет ссылок.
+
+    Одним файлом могут пользоваться несколько постов, поэтому ссылки
+    считаются по индексированному полю image. Проверка
+    и удаление идут под блокировкой файла, которую до вставки поста
+    держит и сохранение загрузки: одновременная загрузка тех же байт
+    либо добавит ссылку раньше проверки, либо увидит, что файла
+    нет, и запишет его заново.
+    """
+    # thumbnail_cache импортирует этот модуль ради render_thumbnail.
+    from .thumbnail_cache import drop_thumbnails
+
+    if not name:
+        return
+    with transaction.atomic():
+        lock_image(name)
+        if Post.objects.filter(image=name).exists():
+            return
+        ImageBlob.objects.filter(name=name).delete()
+        try:
+            drop_thumbnails(name)
+            post_image_storage.delete(name)
+        except (OSError, SuspiciousFileOperation):
+            # Удаление поста не должно падать из-за файла вне хранилища.
+            logger.warning('Не удалось удалить файл %s', name, exc_info=True)
@@ -0,0 +1,331 @@
+import csv
+import json
+from collections import Counter
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import constants
+from .models import Comment, Follow, Group, ImportedRecord, Post, User
+
+KINDS = ('post', 'comment', 'follow')
+MODELS = {'post': Post, 'comment': Comment, 'follow': Follow}
+
+
+class RecordError(ValueError):
+    """Запись импорта не удалось разобрать."""
+
+
+def read_jsonl(file):
+    """Пары (номер строки, запись) из файла JSON Lines."""
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def read_csv(file, kind):
+    """Пары (номер строки, запись) из CSV с записями одного типа."""
+    for number, row in enumerate(csv.DictReader(file), 1):
+        row.setdefault('type', kind)
+        yield number, row
+
+
+INSERT_SQL = '{insert} {table} ({columns}) VALUES {rows}{suffix}'
+
+
+def insert_rows(model, objs, batch_size, ignore_conflicts=False,
+                set_pks=False):
+    """Вставляет объекты многострочными INSERT, не меняя их значений.
+
+    В отличие от bulk_create, auto_now_add не подменяет даты из
+    источника, а глобальные настройки полей не трогаются. Вернёт
+    число вставленных строк: при ignore_conflicts строки с занятыми
+    ключами не считаются. С set_pks объекты без id получают id
+    вставленных строк.
+    """
+    meta = model._meta
+    ops = connection.ops
+    groups = (
+        (
+            [obj for obj in objs if obj.pk is not None],
+            meta.concrete_fields,
+        ),
+        (
+            [obj for obj in objs if obj.pk is None],
+            [field for field in meta.concrete_fields
+             if field is not meta.auto_field],
+        ),
+    )
+    inserted = 0
+    with connection.cursor() as cursor:
+        for group, fields in groups:
+            if not group:
+                continue
+            # Явный batch_size Django 2.2 не урезает до лимитов базы
+            # (у SQLite - 999 параметров в запросе).
+            size = min(batch_size, ops.bulk_batch_size(fields, group))
+            # id новой строки база сообщает только для одиночной вставки.
+            returns_pk = set_pks and group[0].pk is None
+            if returns_pk:
+                size = 1
+            row = '({})'.format(', '.join(['%s'] * len(fields)))
+            for start in range(0, len(group), size):
+                batch = group[start:start + size]
+                sql = INSERT_SQL.format(
+                    insert=ops.insert_statement(
+                        ignore_conflicts=ignore_conflicts
+                    ),
+                    table=ops.quote_name(meta.db_table),
+                    columns=', '.join(
+                        ops.quote_name(field.column) for field in fields
+                    ),
+                    rows=', '.join([row] * len(batch)),
+                    suffix=ops.ignore_conflicts_suffix_sql(
+                        ignore_conflicts=ignore_conflicts
+                    ),
+                )
+                cursor.execute(sql, [
+                    field.get_db_prep_save(
+                        field.pre_save(obj, add=False),
+                        connection
+                    )
+                    for obj in batch
+                    for field in fields
+                ])
+                inserted += cursor.rowcount
+                if returns_pk:
+                    batch[0].pk = ops.last_insert_id(
+                        cursor,
+                        meta.db_table,
+                        meta.pk.column
+                    )
+
+    return inserted
+
+
+def _parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise RecordError(f'Некорректная дата: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+
+    return date
+
+
+def _source_id(value):
+    if value in (None, ''):
+        return None
+    value = str(value)
+    if len(value) > constants.IMPORT_SOURCE_ID_MAX_LENGTH:
+        raise RecordError(f'Слишком длинный id: {value}')
+
+    return value
+
+
+class Importer:
+    """Потоковый импорт постов, комментариев и подписок.
+
+    Записи копятся в буферах и пишутся через bulk_create пачками
+    по batch_size, каждые chunk_size записей фиксируются одной
+    транзакцией. Авторы и группы ищутся через словари в памяти,
+    отсутствующие создаются.
+
+    id из источника не становятся id строк: посты и комментарии
+    получают свои id, а соответствие хранится в ImportedRecord в
+    той же транзакции. Через него комментарии находят свой пост,
+    а повторный импорт тех же строк (и --resume) пропускает уже
+    созданные записи. Пропуски, в том числе повторные подписки,
+    учитываются в counts['skipped'].
+    """
+
+    def __init__(self, batch_size=constants.IMPORT_BATCH_SIZE,
+                 chunk_size=constants.IMPORT_CHUNK_SIZE):
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.user_ids = {}
+        self.group_ids = {}
+        self.buffers = {kind: [] for kind in KINDS}
+        self.counts = Counter()
+
+    def get_user_id(self, username):
+        if not username:
+            raise RecordError('Не указан пользователь.')
+        if username not in self.user_ids:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                user = User.objects.create_user(username=username)
+                self.counts['users_created'] += 1
+            self.user_ids[username] = user.pk
+
+        return self.user_ids[username]
+
+    def get_group_id(self, slug, title=None):
+        if not slug:
+            return None
+        if slug not in self.group_ids:
+            group, created = Group.objects.get_or_create(
+                slug=slug,
+                defaults={'title': title or slug, 'description': ''}
+            )
+            self.counts['groups_created'] += int(created)
+            self.group_ids[slug] = group.pk
+
+        return self.group_ids[slug]
+
+    def build(self, record):
+        """Объект модели из записи импорта."""
+        if not isinstance(record, dict):
+            raise RecordError('Запись не является объектом.')
+        kind = record.get('type')
+        try:
+            if kind == 'post':
+                post = Post(
+                    author_id=self.get_user_id(record.get('author')),
+                    group_id=self.get_group_id(
+                        record.get('group'),
+                        record.get('group_title')
+                    ),
+                    text=record['text'],
+                    pub_date=_parse_date(record.get('pub_date')),
+                )
+                post._source_id = _source_id(record.get('id'))
+                return kind, post
+            if kind == 'comment':
+                source_post_id = _source_id(record.get('post'))
+                if source_post_id is None:
+                    raise RecordError('Не указан пост.')
+                comment = Comment(
+                    author_id=self.get_user_id(record.get('author')),
+                    text=record['text'],
+                    created=_parse_date(record.get('created')),
+                )
+                comment._source_id = _source_id(record.get('id'))
+                comment._source_post_id = source_post_id
+                return kind, comment
+            if kind == 'follow':
+                user_id = self.get_user_id(record.get('user'))
+                author_id = self.get_user_id(record.get('author'))
+                if user_id == author_id:
+                    raise RecordError('Подписка на самого себя.')
+                return kind, Follow(user_id=user_id, author_id=author_id)
+        except (KeyError, TypeError, ValueError) as error:
+            raise RecordError(str(error)) from error
+        raise RecordError(f'Неизвестный тип записи: {kind}')
+
+    def drop_orphan_comments(self):
+        """Привязывает комментарии к импортированным постам.
+
+        Пост ищется по id источника. Комментарии к постам, которые
+        импорт не создавал, отбрасываются, даже если в базе есть
+        пост с таким же id.
+        """
+        comments = self.buffers['comment']
+        post_ids = dict(ImportedRecord.objects.filter(
+            kind='post',
+            source_id__in={comment._source_post_id for comment in comments},
+            local_id__in=Post.objects.values('pk')
+        ).values_list('source_id', 'local_id'))
+        kept = []
+        for comment in comments:
+            comment.post_id = post_ids.get(comment._source_post_id)
+            if comment.post_id is not None:
+                kept.append(comment)
+        self.counts['skipped'] += len(comments) - len(kept)
+        self.buffers['comment'] = kept
+
+    def drop_imported(self, kind):
+        """Отбрасывает записи, уже импортированные раньше, и повторы."""
+        buffer = self.buffers[kind]
+        imported = set(ImportedRecord.objects.filter(
+            kind=kind,
+            source_id__in={
+                obj._source_id for obj in buffer
+                if obj._source_id is not None
+            }
+        ).values_list('source_id', flat=True))
+        kept = []
+        for obj in buffer:
+            if obj._source_id is not None:
+                if obj._source_id in imported:
+                    continue
+                imported.add(obj._source_id)
+            kept.append(obj)
+        self.counts['skipped'] += len(buffer) - len(kept)
+        self.buffers[kind] = kept
+
+    def flush(self):
+        """Записывает буферы: посты раньше комментариев к ним."""
+        for kind in KINDS:
+            if not self.buffers[kind]:
+                continue
+            if kind == 'follow':
+                buffer = self.buffers[kind]
+                inserted = insert_rows(
+                    Follow,
+                    buffer,
+                    self.batch_size,
+                    ignore_conflicts=True
+                )
+                self.counts['skipped'] += len(buffer) - inserted
+            else:
+                if kind == 'comment':
+                    self.drop_orphan_comments()
+                self.drop_imported(kind)
+                buffer = self.buffers[kind]
+                inserted = insert_rows(
+                    MODELS[kind],
+                    buffer,
+                    self.batch_size,
+                    set_pks=True
+                )
+                insert_rows(
+                    ImportedRecord,
+                    [
+                        ImportedRecord(
+                            kind=kind,
+                            source_id=obj._source_id,
+                            local_id=obj.pk,
+                        )
+                        for obj in buffer if obj._source_id is not None
+                    ],
+                    self.batch_size
+                )
+            self.counts[kind] += inserted
+            buffer.clear()
+
+    def run(self, records, skip_until=0):
+        """Импортирует записи, после каждой транзакции отдаёт прогресс.
+
+        Генератор выдаёт номер последней зафиксированной строки,
+        его можно сохранить как точку возобновления.
+        """
+        records = (
+            (number, record) for number, record in records
+            if number > skip_until
+        )
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                for number, record in chunk:
+                    try:
+                        kind, obj = self.build(record)
+                    except RecordError:
+                        self.counts['skipped'] += 1
+                        continue
+                    self.buffers[kind].append(obj)
+                    if len(self.buffers[kind]) >= self.batch_size:
+                        self.flush()
+                self.flush()
+            yield chunk[-1][0]
@@ -0,0 +1,402 @@
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urljoin, urlsplit
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+)
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer,
+    WSGIRequestHandler,
+)
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.test import Client
+from django.urls import Resolver404, resolve, reverse
+from django.utils.module_loading import import_string
+
+from . import constants
+from .models import Group, Post, User
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу из отсортированного списка."""
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+
+    return values[rank - 1]
+
+
+class Recorder:
+    """Собирает задержки, ошибки и число запросов к базе по маршрутам."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = Counter()
+        self.scenarios = Counter()
+
+    def add(self, route, seconds, status, queries=None):
+        with self.lock:
+            self.latencies[route].append(seconds * 1000)
+            if queries is not None:
+                self.queries[route].append(queries)
+            if status >= 400:
+                self.errors[route] += 1
+
+    def scenario_done(self, name):
+        with self.lock:
+            self.scenarios[name] += 1
+
+    def route_report(self, route):
+        latencies = sorted(self.latencies[route])
+        queries = self.queries[route]
+        histogram = Counter()
+        for latency in latencies:
+            bucket = next(
+                (f'<={limit}ms' for limit in LATENCY_BUCKETS_MS
+                 if latency <= limit),
+                f'>{LATENCY_BUCKETS_MS[-1]}ms'
+            )
+            histogram[bucket] += 1
+
+        return {
+            'requests': len(latencies),
+            'errors': self.errors[route],
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'max_ms': round(latencies[-1], 3),
+            'histogram': dict(histogram),
+            'queries_mean': (
+                round(sum(queries) / len(queries), 2) if queries else None
+            ),
+            'queries_max': max(queries) if queries else None,
+        }
+
+    def report(self, elapsed):
+        """Отчёт для сравнения запусков: всё сериализуется в JSON."""
+        total = sum(len(values) for values in self.latencies.values())
+
+        return {
+            'requests': total,
+            'errors': sum(self.errors.values()),
+            'duration_s': round(elapsed, 3),
+            'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+            'scenarios': dict(self.scenarios),
+            'routes': {
+                route: self.route_report(route)
+                for route in sorted(self.latencies)
+            },
+        }
+
+
+def route_name(path):
+    """Имя маршрута для пути запроса, например posts:index."""
+    try:
+        return resolve(urlsplit(path).path).view_name
+    except Resolver404:
+        return path
+
+
+class ClientDriver:
+    """Запросы через тестовый клиент в текущем процессе.
+
+    Запросы к базе считаются обёрткой соединения потока, в котором
+    выполняется запрос.
+    """
+
+    def __init__(self):
+        self.client = Client()
+
+    def login(self, user):
+        self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        """Вернёт статус, время в секундах и число запросов к базе."""
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count):
+            response = getattr(self.client, method)(path, data)
+
+        return response.status_code, time.perf_counter() - started, queries
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpDriver:
+    """Запросы по HTTP к запущенному серверу.
+
+    Сервер должен работать с той же базой: вход выполняется сессией,
+    созданной прямо в хранилище сессий. Число запросов к базе берётся
+    из заголовка X-Query-Count, который сервер отдаёт при DEBUG.
+    Переадресации не выполняются, их время меряется отдельно.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.cookies = {}
+        self.opener = build_opener(_NoRedirect)
+
+    def login(self, user):
+        store = import_string(f'{settings.SESSION_ENGINE}.SessionStore')()
+        store[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.save()
+        self.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+
+    def _open(self, method, path, data=None):
+        request = Request(
+            urljoin(self.base_url, path),
+            data=urlencode(data).encode() if data is not None else None,
+            method=method.upper(),
+            headers={'Cookie': '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            )}
+        )
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                status, headers = response.status, response.headers
+        except HTTPError as error:
+            error.read()
+            status, headers = error.code, error.headers
+        for header in headers.get_all('Set-Cookie') or ():
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+
+        return status, headers
+
+    def request(self, method, path, data=None):
+        """Вернёт статус, время в секундах и число запросов к базе."""
+        if method == 'post':
+            if settings.CSRF_COOKIE_NAME not in self.cookies:
+                # Cookie с токеном ставит страница с формой.
+                self._open('get', reverse('posts:post_create'))
+            data = {
+                **(data or {}),
+                'csrfmiddlewaretoken': self.cookies.get(
+                    settings.CSRF_COOKIE_NAME
+                ),
+            }
+        started = time.perf_counter()
+        status, headers = self._open(method, path, data)
+        elapsed = time.perf_counter() - started
+        queries = headers.get('X-Query-Count')
+
+        return status, elapsed, int(queries) if queries is not None else None
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve():
+    """Запускает локальный многопоточный WSGI-сервер проекта.
+
+    Вернёт адрес сервера и сам сервер, чтобы его можно было
+    остановить через shutdown().
+    """
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+
+    return f'http://{host}:{port}/', server
+
+
+class Sample:
+    """Группы, авторы, посты и пользователи, по которым ходят сценарии."""
+
+    def __init__(self, size=constants.LOADTEST_SAMPLE_SIZE):
+        recent = list(Post.objects.order_by('-pk').values_list(
+            'pk',
+            'author__username'
+        )[:size])
+        self.post_ids = [post_id for post_id, _ in recent]
+        self.usernames = sorted({username for _, username in recent})
+        self.group_slugs = list(Group.objects.order_by('pk').values_list(
+            'slug',
+            flat=True
+        )[:size])
+        self.members = list(User.objects.filter(
+            is_active=True
+        ).order_by('pk')[:size])
+
+    def missing(self):
+        """Чего не хватает в базе для сценариев."""
+        return [
+            name for name in ('post_ids', 'usernames', 'members')
+            if not getattr(self, name)
+        ]
+
+
+class Visitor:
+    """Посетитель одного потока: гость и пользователь со своими сессиями.
+
+    Результаты запросов пишутся в recorder, который можно сменить,
+    например после прогрева.
+    """
+
+    def __init__(self, sample, rng, make_driver, recorder):
+        self.sample = sample
+        self.rng = rng
+        self.recorder = recorder
+        self.guest = make_driver()
+        self.member = make_driver()
+        self.member.login(rng.choice(sample.members))
+
+    def request(self, method, path, data=None, member=False):
+        driver = self.member if member else self.guest
+        status, elapsed, queries = driver.request(method, path, data)
+        self.recorder.add(route_name(path), elapsed, status, queries)
+
+    def get(self, path, member=False):
+        self.request('get', path, member=member)
+
+    def post(self, path, data):
+        self.request('post', path, data, member=True)
+
+    def text(self):
+        return f'Нагрузочный текст {self.rng.randrange(10 ** 9)}'
+
+
+def browse_index(visitor):
+    visitor.get(reverse('posts:index'))
+
+
+def browse_group(visitor):
+    if visitor.sample.group_slugs:
+        slug = visitor.rng.choice(visitor.sample.group_slugs)
+        visitor.get(reverse('posts:group_list', args=[slug]))
+
+
+def browse_profile(visitor):
+    username = visitor.rng.choice(visitor.sample.usernames)
+    visitor.get(reverse('posts:profile', args=[username]))
+
+
+def read_post(visitor):
+    post_id = visitor.rng.choice(visitor.sample.post_ids)
+    visitor.get(reverse('posts:post_detail', args=[post_id]))
+
+
+def follow_feed(visitor):
+    visitor.get(reverse('posts:follow_index'), member=True)
+
+
+def create_post(visitor):
+    visitor.post(reverse('posts:post_create'), {'text': visitor.text()})
+
+
+def add_comment(visitor):
+    post_id = visitor.rng.choice(visitor.sample.post_ids)
+    visitor.post(
+        reverse('posts:add_comment', args=[post_id]),
+        {'text': visitor.text()}
+    )
+
+
+SCENARIOS = {
+    'browse_index': browse_index,
+    'browse_group': browse_group,
+    'browse_profile': browse_profile,
+    'read_post': read_post,
+    'follow_feed': follow_feed,
+    'create_post': create_post,
+    'add_comment': add_comment,
+}
+DEFAULT_WEIGHTS = {
+    'browse_index': 40,
+    'browse_group': 15,
+    'browse_profile': 15,
+    'read_post': 15,
+    'follow_feed': 10,
+    'create_post': 3,
+    'add_comment': 2,
+}
+
+
+def run_load(weights, iterations, workers=1, warmup=0, seed=0,
+             base_url=None, sample=None):
+    """Прогоняет сценарии в пуле потоков и вернёт отчёт.
+
+    Каждый поток выполняет свою долю iterations сценариев, выбирая
+    их по весам своим генератором случайных чисел, поэтому
+    последовательность сценариев повторяется от запуска к запуску.
+    Первые warmup сценариев потока в отчёт не попадают.
+    """
+    sample = sample or Sample()
+    names = [name for name, weight in weights.items() if weight > 0]
+    recorder = Recorder()
+    measured_from = []
+
+    def make_driver():
+        return HttpDriver(base_url) if base_url else ClientDriver()
+
+    def work(worker, count):
+        rng = random.Random(f'{seed}:{worker}')
+        visitor = Visitor(sample, rng, make_driver, Recorder())
+        for step in range(warmup + count):
+            if step == warmup:
+                visitor.recorder = recorder
+                measured_from.append(time.perf_counter())
+            name = rng.choices(
+                names,
+                weights=[weights[name] for name in names]
+            )[0]
+            SCENARIOS[name](visitor)
+            visitor.recorder.scenario_done(name)
+
+    shares = [
+        iterations // workers + (worker < iterations % workers)
+        for worker in range(workers)
+    ]
+    if workers == 1:
+        # Один поток работает в текущем: так можно мерить и базу
+        # в памяти, которую другие потоки не видят.
+        work(0, shares[0])
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_in_thread, work, worker, share)
+                for worker, share in enumerate(shares)
+            ]
+            for future in futures:
+                future.result()
+    finished = time.perf_counter()
+
+    return recorder.report(finished - min(measured_from, default=finished))
+
+
+def _in_thread(func, *args):
+    try:
+        func(*args)
+    finally:
+        connections.close_all()
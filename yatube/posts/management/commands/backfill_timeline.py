@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import backfill_all
+
+
+class Command(BaseCommand):
+    """Заполняет материализованные ленты по существующим подпискам."""
+
+    help = 'Заполняет ленты подписок по существующим записям Follow.'
+
+    def handle(self, *args, **options):
+        total = backfill_all()
+        self.stdout.write(
+            self.style.SUCCESS(f'Добавлено записей лент: {total}')
+        )
@@ -0,0 +1,107 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import constants
+from posts.template_bench import PAGES, find_regressions, run_benchmarks
+
+
+class Command(BaseCommand):
+    """Замеряет отрисовку шаблонов страниц с карточками постов."""
+
+    help = (
+        'Отрисовывает страницы с постами на неизменных контекстах и '
+        'выводит время, память и стоимость одной карточки; сравнивает '
+        'результат с базовым отчётом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            nargs='+',
+            choices=tuple(PAGES),
+            default=tuple(PAGES),
+            help='Страницы для замера.'
+        )
+        parser.add_argument(
+            '--cards',
+            nargs='+',
+            type=int,
+            default=constants.TEMPLATE_BENCH_CARDS,
+            help='Количества карточек на странице.'
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=constants.TEMPLATE_BENCH_ROUNDS,
+            help='Количество раундов замера.'
+        )
+        parser.add_argument(
+            '--min-round-seconds',
+            type=float,
+            default=constants.TEMPLATE_BENCH_MIN_ROUND_SECONDS,
+            help='Минимальная длительность одного раунда.'
+        )
+        parser.add_argument(
+            '--image-ratio',
+            type=float,
+            default=0.5,
+            help='Доля постов с картинкой.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл, куда сохранить отчёт в JSON.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Базовый отчёт JSON для поиска регрессий.'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=constants.TEMPLATE_BENCH_THRESHOLD,
+            help='Допустимое замедление, доля от базового времени.'
+        )
+
+    def handle(self, *args, **options):
+        if min(options['cards']) < 0 or options['rounds'] < 1:
+            raise CommandError('Нужны неотрицательные --cards и --rounds.')
+        report = run_benchmarks(
+            pages=options['pages'],
+            cards=options['cards'],
+            rounds=options['rounds'],
+            min_round_seconds=options['min_round_seconds'],
+            image_ratio=options['image_ratio'],
+        )
+        for page, result in report['pages'].items():
+            for count, stats in result['cards'].items():
+                self.stdout.write(
+                    f'{page:<12} карточек {count:>4}: '
+                    f'{stats["render_us"]:>10.1f} мкс '
+                    f'(медиана {stats["median_us"]:.1f}), '
+                    f'память {stats["peak_alloc_bytes"] / 1024:.1f} КиБ, '
+                    f'запросов {stats["queries"]}'
+                )
+            self.stdout.write(
+                f'{page:<12} на карточку: {result["per_card_us"]} мкс, '
+                f'{result["per_card_alloc_bytes"]} байт'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+            regressions = find_regressions(
+                report,
+                baseline,
+                options['threshold']
+            )
+            for name, old, new in regressions:
+                self.stderr.write(
+                    f'{name}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)'
+                )
+            if regressions:
+                raise CommandError(f'Регрессий: {len(regressions)}')
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
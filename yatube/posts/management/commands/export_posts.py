@@ -0,0 +1,80 @@
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import constants
+from posts.exporter import iter_ndjson, iter_post_records
+
+
+class Command(BaseCommand):
+    """Потоково выгружает посты в NDJSON."""
+
+    help = 'Выгружает посты в NDJSON (можно в gzip) без загрузки в память.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл выгрузки, "-" - стандартный вывод.'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжать выгрузку gzip (по умолчанию для файлов .gz).'
+        )
+        parser.add_argument(
+            '--since',
+            help='Выгрузить только посты, опубликованные с этого момента.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=constants.EXPORT_CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за раз.'
+        )
+
+    def parse_since(self, value):
+        if value is None:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            raise CommandError(f'Некорректная дата --since: {value}')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+        return since
+
+    def open_output(self, path, compress):
+        if path == '-':
+            if compress:
+                return gzip.open(sys.stdout.buffer, 'wt', encoding='utf-8')
+            return None
+        if compress:
+            return gzip.open(path, 'wt', encoding='utf-8')
+
+        return open(path, 'w', encoding='utf-8')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        compress = options['gzip'] or path.endswith('.gz')
+        records = iter_post_records(
+            since=self.parse_since(options['since']),
+            chunk_size=options['chunk_size']
+        )
+        output = self.open_output(path, compress)
+        total = 0
+        try:
+            for line in iter_ndjson(records):
+                if output is None:
+                    self.stdout.write(line, ending='')
+                else:
+                    output.write(line)
+                total += 1
+        finally:
+            if output is not None:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(f'Выгружено постов: {total}'))
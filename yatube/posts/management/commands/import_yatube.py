@@ -0,0 +1,124 @@
+import json
+import os
+import sys
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import constants
+from posts.autocomplete import invalidate_indexes
+from posts.counters import reconcile_counters
+from posts.feed_cache import SITE, bump_versions
+from posts.importer import KINDS, Importer, read_csv, read_jsonl
+
+
+class Command(BaseCommand):
+    """Потоково импортирует посты, комментарии и подписки."""
+
+    help = (
+        'Импортирует посты, комментарии и подписки из JSON Lines или CSV '
+        'пачками bulk_create с точками возобновления.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл для импорта, "-" - стандартный ввод.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('jsonl', 'csv'),
+            help='Формат файла, по умолчанию - по расширению.'
+        )
+        parser.add_argument(
+            '--kind',
+            choices=KINDS,
+            help='Тип записей CSV-файла.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=constants.IMPORT_BATCH_SIZE,
+            help='Количество строк в одном bulk_create.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=constants.IMPORT_CHUNK_SIZE,
+            help='Количество записей в одной транзакции.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл, куда пишется номер последней импортированной строки.'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить с строки, сохранённой в --checkpoint.'
+        )
+        parser.add_argument(
+            '--skip-post-process',
+            action='store_true',
+            help='Не пересчитывать счётчики и ленты после импорта.'
+        )
+
+    def read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as file:
+            return json.load(file)['line']
+
+    def write_checkpoint(self, path, line):
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump({'line': line}, file)
+        os.replace(temp_path, path)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        if file_format == 'csv' and not options['kind']:
+            raise CommandError('Для CSV нужно указать --kind.')
+        if options['resume'] and not options['checkpoint']:
+            raise CommandError('Для --resume нужно указать --checkpoint.')
+        skip_until = 0
+        if options['resume']:
+            skip_until = self.read_checkpoint(options['checkpoint'])
+
+        file = sys.stdin if path == '-' else open(path, newline='')
+        try:
+            if file_format == 'csv':
+                records = read_csv(file, options['kind'])
+            else:
+                records = read_jsonl(file)
+            importer = Importer(options['batch_size'], options['chunk_size'])
+            started = time.perf_counter()
+            for line in importer.run(records, skip_until):
+                if options['checkpoint']:
+                    self.write_checkpoint(options['checkpoint'], line)
+                rows = sum(importer.counts[kind] for kind in KINDS)
+                rate = rows / max(time.perf_counter() - started, 1e-9)
+                self.stdout.write(
+                    f'Строка {line}: записей {rows}, {rate:.0f} записей/с'
+                )
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+        counts = importer.counts
+        if not options['skip_post_process'] and any(
+            counts[kind] for kind in KINDS
+        ):
+            reconcile_counters()
+            call_command('backfill_timeline', stdout=self.stdout)
+            bump_versions('feed', SITE)
+            invalidate_indexes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов: {counts["post"]}, комментариев: {counts["comment"]}, '
+            f'подписок: {counts["follow"]}, пропущено: {counts["skipped"]}, '
+            f'новых пользователей: {counts["users_created"]}, '
+            f'новых групп: {counts["groups_created"]}'
+        ))
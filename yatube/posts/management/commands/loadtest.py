@@ -0,0 +1,122 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.loadtest import DEFAULT_WEIGHTS, SCENARIOS, Sample, run_load, serve
+
+
+def weight_option(value):
+    name, _, weight = value.partition('=')
+    if name not in SCENARIOS:
+        raise ValueError(f'Неизвестный сценарий: {name}')
+
+    return name, int(weight)
+
+
+class Command(BaseCommand):
+    """Нагружает представления постов сценариями и меряет задержки."""
+
+    help = (
+        'Прогоняет взвешенные сценарии в пуле потоков и выводит JSON '
+        'с перцентилями задержек, пропускной способностью и числом '
+        'запросов к базе по маршрутам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=1000,
+            help='Сколько сценариев выполнить всего.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков.'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=10,
+            help='Сценарии прогрева каждого потока, не входят в отчёт.'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно выбора сценариев и их параметров.'
+        )
+        parser.add_argument(
+            '--weight',
+            type=weight_option,
+            action='append',
+            default=[],
+            metavar='SCENARIO=WEIGHT',
+            help=(
+                'Вес сценария, можно указать несколько раз. Сценарии: '
+                + ', '.join(SCENARIOS)
+            )
+        )
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument(
+            '--url',
+            help='Адрес запущенного сервера с той же базой.'
+        )
+        target.add_argument(
+            '--serve',
+            action='store_true',
+            help='Поднять локальный WSGI-сервер вместо тестового клиента.'
+        )
+        parser.add_argument(
+            '--label',
+            help='Метка запуска в отчёте, например хэш коммита.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для отчёта, по умолчанию - стандартный вывод.'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['workers'] < 1:
+            raise CommandError('Нужны хотя бы одна итерация и один поток.')
+        weights = {**DEFAULT_WEIGHTS, **dict(options['weight'])}
+        if not any(weight > 0 for weight in weights.values()):
+            raise CommandError('Все сценарии выключены.')
+        sample = Sample()
+        if sample.missing():
+            raise CommandError(
+                'В базе нет данных для сценариев, заполните её '
+                'командой seed_perf.'
+            )
+
+        server = None
+        base_url = options['url']
+        if options['serve']:
+            base_url, server = serve()
+        try:
+            report = run_load(
+                weights,
+                options['iterations'],
+                workers=options['workers'],
+                warmup=options['warmup'],
+                seed=options['seed'],
+                base_url=base_url,
+                sample=sample,
+            )
+        finally:
+            if server is not None:
+                server.shutdown()
+        report = {
+            'label': options['label'],
+            'target': base_url or 'client',
+            'workers': options['workers'],
+            'weights': weights,
+            **report,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import constants
+from posts.counters import reconcile_counters
+from posts.feed_cache import SITE, bump_versions
+
+
+class Command(BaseCommand):
+    """Пересчитывает денормализованные счётчики постов и подписок."""
+
+    help = 'Пересчитывает счётчики постов, комментариев и подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=constants.COUNTERS_CHUNK_SIZE,
+            help='Количество строк в одной пачке пересчёта.'
+        )
+
+    def handle(self, *args, **options):
+        users, posts = reconcile_counters(options['chunk_size'])
+        # Счётчики менялись в обход сигналов, страницы со старыми
+        # значениями больше не должны отвечать 304.
+        bump_versions(SITE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано пользователей: {users}, постов: {posts}'
+        ))
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import constants
+from posts.queue import due_task_ids, purge_finished, run_task
+
+
+def _run_and_close(task_id):
+    try:
+        return run_task(task_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Выполняет фоновые задачи из очереди в пуле потоков."""
+
+    help = 'Выполняет отложенные, повторяемые и брошенные фоновые задачи.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков исполнителя.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить задачи, которые пора запускать, и выйти.'
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=constants.TASK_POLL_SECONDS,
+            help='Пауза между проверками пустой очереди, в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        # С одним потоком задачи выполняются прямо в команде.
+        executor = None
+        if workers > 1:
+            executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix='run_tasks'
+            )
+        run_all = executor.map if executor else map
+        runner = _run_and_close if executor else run_task
+        done = failed = 0
+        try:
+            while True:
+                task_ids = due_task_ids(workers * 2)
+                for succeeded in run_all(runner, task_ids):
+                    if succeeded:
+                        done += 1
+                    else:
+                        failed += 1
+                if not task_ids:
+                    purge_finished()
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+        finally:
+            if executor:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'
+        ))
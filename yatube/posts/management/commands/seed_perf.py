@@ -0,0 +1,141 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import constants
+from posts.autocomplete import invalidate_indexes
+from posts.counters import reconcile_counters
+from posts.feed_cache import SITE, bump_versions
+from posts.seeding import Seeder
+from posts.timeline import PULLED_AUTHORS_CACHE_KEY, backfill_all
+
+
+class Command(BaseCommand):
+    """Заполняет базу большим детерминированным набором данных."""
+
+    help = (
+        'Создаёт пользователей, группы, посты, комментарии и подписки '
+        'со степенным распределением для проверки производительности.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Количество пользователей.'
+        )
+        parser.add_argument(
+            '--groups',
+            type=int,
+            default=50,
+            help='Количество групп.'
+        )
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=10000,
+            help='Количество постов.'
+        )
+        parser.add_argument(
+            '--comments',
+            type=int,
+            default=20000,
+            help='Количество комментариев.'
+        )
+        parser.add_argument(
+            '--follows-per-user',
+            type=float,
+            default=20,
+            help='Среднее число подписок одного пользователя.'
+        )
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=0,
+            help='Количество разных картинок для постов.'
+        )
+        parser.add_argument(
+            '--image-ratio',
+            type=float,
+            default=0.2,
+            help='Доля постов с картинкой, если картинки включены.'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора: одно зерно - один и тот же набор.'
+        )
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Префикс имён пользователей и адресов групп.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=constants.SEED_BATCH_SIZE,
+            help='Количество строк в одном INSERT.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=constants.SEED_CHUNK_SIZE,
+            help='Количество строк в одной транзакции.'
+        )
+        parser.add_argument(
+            '--skip-post-process',
+            action='store_true',
+            help='Не пересчитывать счётчики и ленты после заполнения.'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 and (options['posts'] or options['comments']):
+            raise CommandError('Для постов нужен хотя бы один пользователь.')
+        seeder = Seeder(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows_per_user=options['follows_per_user'],
+            images=options['images'],
+            image_ratio=options['image_ratio'] if options['images'] else 0,
+            seed=options['seed'],
+            prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+        )
+        if seeder.usernames_taken():
+            raise CommandError(
+                f'Пользователи с префиксом {options["prefix"]} уже есть, '
+                'укажите другой --prefix.'
+            )
+
+        started = time.perf_counter()
+        for model, written in seeder.run():
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{model.__name__}: {written} за {elapsed:.1f} с'
+            )
+
+        if not options['skip_post_process']:
+            step_started = time.perf_counter()
+            reconcile_counters()
+            self.stdout.write(
+                f'Счётчики за {time.perf_counter() - step_started:.1f} с'
+            )
+            step_started = time.perf_counter()
+            # Популярные авторы определяются по новым счётчикам.
+            cache.delete(PULLED_AUTHORS_CACHE_KEY)
+            entries = backfill_all()
+            self.stdout.write(
+                f'Ленты: {entries} записей '
+                f'за {time.perf_counter() - step_started:.1f} с'
+            )
+            bump_versions('feed', SITE)
+            invalidate_indexes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с'
+        ))
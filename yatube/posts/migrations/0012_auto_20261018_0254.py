@@ -0,0 +1,69 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:54
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    duplicates = Follow.objects.values('user_id', 'author_id').annotate(
+        first_id=Min('id'),
+        total=Count('id'),
+    ).filter(total__gt=1)
+    for row in duplicates:
+        Follow.objects.filter(
+            user_id=row['user_id'],
+            author_id=row['author_id'],
+        ).exclude(id=row['first_id']).delete()
+        AuthorStats.objects.filter(user_id=row['author_id']).update(
+            follower_count=Follow.objects.filter(
+                author_id=row['author_id']
+            ).count()
+        )
+        AuthorStats.objects.filter(user_id=row['user_id']).update(
+            following_count=Follow.objects.filter(
+                user_id=row['user_id']
+            ).count()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_auto_20261018_0252'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='timelineentry',
+            name='timeline_user_pub_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'pub_date'], name='post_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', 'pub_date'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'pub_date', 'post'], name='timeline_user_pub_date_idx'),
+        ),
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='follow_unique_user_author'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_auto_20261018_0254'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_webp',
+            field=models.ImageField(blank=True, editable=False, upload_to='posts/', verbose_name='Картинка WebP'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+
+def fts_statements(table):
+    """Таблица FTS5 над table.text и триггеры синхронизации с ней."""
+    fts = f'{table}_fts'
+    return (
+        f"CREATE VIRTUAL TABLE {fts} USING fts5("
+        f"text, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, text) "
+        f"VALUES ('delete', old.id, old.text); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF text ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, text) "
+        f"VALUES ('delete', old.id, old.text); "
+        f"INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    )
+
+
+def drop_statements(table):
+    fts = f'{table}_fts'
+    return (
+        f'DROP TRIGGER IF EXISTS {fts}_ai',
+        f'DROP TRIGGER IF EXISTS {fts}_ad',
+        f'DROP TRIGGER IF EXISTS {fts}_au',
+        f'DROP TABLE IF EXISTS {fts}',
+    )
+
+
+def run_for_sqlite(statements):
+    def run(apps, schema_editor):
+        # Полнотекстовый индекс есть только у SQLite.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for table in ('posts_post', 'posts_comment'):
+            for statement in statements(table):
+                schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_auto_20261018_0303'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_sqlite(fts_statements),
+            run_for_sqlite(drop_statements)
+        ),
+    ]
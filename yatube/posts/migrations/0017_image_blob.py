@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Файл')),
+                ('used', models.DateTimeField(verbose_name='Последнее обращение')),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+from importlib import import_module
+
+from django.db import migrations
+
+from posts.storage import post_image_storage
+
+search_index = import_module('posts.migrations.0015_search_index')
+
+
+def delete_webp_files(apps, schema_editor):
+    # Без поля на WebP-файлы не останется ссылок.
+    Post = apps.get_model('posts', 'Post')
+    ImageBlob = apps.get_model('posts', 'ImageBlob')
+    names = Post.objects.exclude(image_webp='').values_list(
+        'image_webp',
+        flat=True
+    ).distinct()
+    for name in names.iterator():
+        if not Post.objects.filter(image=name).exists():
+            ImageBlob.objects.filter(name=name).delete()
+            post_image_storage.delete(name)
+
+
+def rebuild_post_search(apps, schema_editor):
+    # SQLite пересоздаёт таблицу при удалении столбца, и триггеры
+    # полнотекстового индекса пропадают вместе со старой таблицей.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in (
+        *search_index.drop_statements('posts_post'),
+        *search_index.fts_statements('posts_post'),
+    ):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_image_blob'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_webp_files, rebuild_post_search),
+        migrations.RemoveField(
+            model_name='post',
+            name='image_webp',
+        ),
+        migrations.RunPython(rebuild_post_search, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_remove_post_image_webp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageStamp',
+            fields=[
+                ('scope', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Область')),
+                ('version', models.BigIntegerField(default=0, verbose_name='Версия')),
+                ('modified', models.DateTimeField(verbose_name='Изменена')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_pagestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16, verbose_name='Тип записи')),
+                ('source_id', models.CharField(max_length=64, verbose_name='id в источнике')),
+                ('local_id', models.BigIntegerField(verbose_name='id в базе')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='importedrecord',
+            constraint=models.UniqueConstraint(fields=('kind', 'source_id'), name='imported_unique_kind_source'),
+        ),
+    ]
@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 from . import constants
+from .storage import post_image_storage
 
 User = get_user_model()
 
@@ -31,16 +32,40 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        blank=True,
+        storage=post_image_storage,
+        db_index=True
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
     )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('pub_date',), name='post_pub_date_idx'),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', 'pub_date'),
+                name='post_group_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         """Строковое представление объекта."""
         return self.text[:constants.SYMBOLS_IN_STR]
 
+    def save(self, *args, **kwargs):
+        # Файл картинки сохраняется под блокировкой ImageBlob, и она
+        # должна держаться, пока не вставлена ссылающаяся строка.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Group(models.Model):
     """Создание модели Group."""
@@ -88,6 +113,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_post_created_idx'
+            ),
+        )
 
     def __str__(self):
         """Строковое представление объекта."""
@@ -107,3 +138,174 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following'
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='follow_unique_user_author'
+            ),
+        )
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField('Дата')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('user', 'pub_date', 'post'),
+                name='timeline_user_pub_date_idx'
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='timeline_unique_user_post'
+            ),
+        )
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики постов и подписок пользователя."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    follower_count = models.PositiveIntegerField(
+        'Подписчиков',
+        default=0,
+        db_index=True
+    )
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+
+class ImageBlob(models.Model):
+    """Файл картинки в хранилище, общий для одинаковых загрузок.
+
+    Строка служит блокировкой файла: сохранение загрузки и удаление
+    файла без ссылок берут её до конца своей транзакции.
+    """
+
+    name = models.CharField('Файл', max_length=255, primary_key=True)
+    used = models.DateTimeField('Последнее обращение')
+
+
+class PageStamp(models.Model):
+    """Отметка изменения области страниц для ETag и Last-Modified.
+
+    Область - строка вида site, feed, post:1 или author:2. Отметки
+    лежат в базе, поэтому все процессы видят одни и те же валидаторы.
+    """
+
+    scope = models.CharField('Область', max_length=64, primary_key=True)
+    version = models.BigIntegerField('Версия', default=0)
+    modified = models.DateTimeField('Изменена')
+
+
+class ImportedRecord(models.Model):
+    """Строка базы, созданная импортом из записи источника.
+
+    id источника - внешний ключ: строки получают свои id, а
+    комментарии находят свой пост через это соответствие.
+    """
+
+    kind = models.CharField('Тип записи', max_length=16)
+    source_id = models.CharField(
+        'id в источнике',
+        max_length=constants.IMPORT_SOURCE_ID_MAX_LENGTH
+    )
+    local_id = models.BigIntegerField('id в базе')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('kind', 'source_id'),
+                name='imported_unique_kind_source'
+            ),
+        )
+
+
+class Task(models.Model):
+    """Фоновая задача локальной очереди."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы', default='[]')
+    idempotency_key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=200,
+        blank=True,
+        null=True
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток',
+        default=constants.TASK_MAX_ATTEMPTS
+    )
+    run_after = models.DateTimeField('Запустить после')
+    locked_until = models.DateTimeField(
+        'Занята до',
+        blank=True,
+        null=True
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', blank=True, null=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='task_status_run_after_idx'
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('idempotency_key',),
+                condition=models.Q(status__in=('pending', 'running')),
+                name='task_unique_active_key'
+            ),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта."""
+        return f'{self.name} [{self.status}]'
@@ -0,0 +1,211 @@
+import base64
+import json
+import math
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+
+MAX_INT = 2 ** 63 - 1
+
+
+def encode_cursor(value, pk, reverse=False):
+    """Кодирует позицию (дата или число, id) в токен для ссылки."""
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    payload = json.dumps([value, pk, int(reverse)])
+
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+class InvalidCursor(ValueError):
+    """Токен курсора не подходит пагинатору."""
+
+
+def decode_cursor(token):
+    """Раскодирует токен курсора, для некорректного вернёт None.
+
+    Значение поля сортировки возвращается как есть, из JSON: его
+    тип проверяет пагинатор, который знает своё поле.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value, pk, reverse = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+    except (TypeError, ValueError):
+        return None
+    if not _is_int(pk) or not isinstance(value, (str, int, float)):
+        return None
+
+    return value, pk, bool(reverse)
+
+
+def _is_int(value):
+    # Числа вне 64 бит база не примет, bool - не id.
+    return (
+        isinstance(value, int)
+        and not isinstance(value, bool)
+        and -MAX_INT - 1 <= value <= MAX_INT
+    )
+
+
+class CursorWindow:
+    """Ленивая выборка одной страницы курсорной пагинации.
+
+    Запрос выполняется при первом обращении к элементам, как и у
+    обычной страницы с QuerySet, поэтому закэшированный шаблон
+    не тратит на неё ни одного запроса.
+    """
+
+    def __init__(self, paginator, cursor):
+        self.paginator = paginator
+        self.cursor = cursor
+        self.reverse = bool(cursor and cursor[2])
+        self._items = None
+        self._has_more = False
+
+    def _fetch(self):
+        if self._items is None:
+            per_page = self.paginator.per_page
+            items = self.paginator.fetch_window(self.cursor, per_page + 1)
+            self._has_more = len(items) > per_page
+            items = items[:per_page]
+            if self.reverse:
+                items.reverse()
+            self._items = items
+
+        return self._items
+
+    def __len__(self):
+        return len(self._fetch())
+
+    def __iter__(self):
+        return iter(self._fetch())
+
+    def __getitem__(self, index):
+        return self._fetch()[index]
+
+    def _encode(self, obj, reverse=False):
+        value, pk = self.paginator.position(obj)
+
+        return encode_cursor(value, pk, reverse)
+
+    @property
+    def next(self):
+        """Токен следующей (более старой) страницы."""
+        items = self._fetch()
+        if not items or not (self.reverse or self._has_more):
+            return None
+
+        return self._encode(items[-1])
+
+    @property
+    def previous(self):
+        """Токен предыдущей (более новой) страницы."""
+        items = self._fetch()
+        if self.cursor is None or not items:
+            return None
+        if self.reverse and not self._has_more:
+            return None
+
+        return self._encode(items[0], reverse=True)
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (дата, id) без COUNT(*) и OFFSET.
+
+    Стоимость страницы не зависит от её глубины: каждая выборка -
+    это диапазон по индексу от позиции курсора.
+    """
+
+    def __init__(self, object_list, per_page, order_field='pub_date',
+                 tiebreak_field='pk', **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.order_field = order_field
+        self.tiebreak_field = tiebreak_field
+
+    def position(self, item):
+        """Позиция строки (поле сортировки, id) для курсора.
+
+        Строка - объект модели или словарь из QuerySet.values().
+        """
+        if isinstance(item, dict):
+            return item[self.order_field], item[self.tiebreak_field]
+
+        return (
+            getattr(item, self.order_field),
+            getattr(item, self.tiebreak_field)
+        )
+
+    def get_order_field(self):
+        """Поле модели, которым проверяется значение из курсора."""
+        meta = self.object_list.model._meta
+        if self.order_field == 'pk':
+            return meta.pk
+
+        return meta.get_field(self.order_field)
+
+    def parse_cursor(self, token):
+        """Позиция из токена; для неподходящего токена - InvalidCursor."""
+        cursor = decode_cursor(token)
+        if cursor is None:
+            raise InvalidCursor(token)
+        value, pk, reverse = cursor
+        try:
+            value = self.get_order_field().to_python(value)
+        except (TypeError, ValueError, OverflowError, ValidationError):
+            raise InvalidCursor(token)
+        if (
+            value is None
+            or isinstance(value, int) and not _is_int(value)
+            or isinstance(value, float) and not math.isfinite(value)
+        ):
+            raise InvalidCursor(token)
+
+        return value, pk, reverse
+
+    def window_queryset(self, cursor, queryset=None):
+        """QuerySet строк, следующих за позицией курсора."""
+        if queryset is None:
+            queryset = self.object_list
+        field = self.order_field
+        tiebreak = self.tiebreak_field
+        if cursor is None:
+            return queryset.order_by(f'-{field}', f'-{tiebreak}')
+        value, pk, reverse = cursor
+        if reverse:
+            return queryset.filter(
+                **{f'{field}__gte': value}
+            ).exclude(
+                **{field: value, f'{tiebreak}__lte': pk}
+            ).order_by(field, tiebreak)
+
+        return queryset.filter(
+            **{f'{field}__lte': value}
+        ).exclude(
+            **{field: value, f'{tiebreak}__gte': pk}
+        ).order_by(f'-{field}', f'-{tiebreak}')
+
+    def fetch_window(self, cursor, limit):
+        """Список из не более чем limit строк после позиции курсора."""
+        return list(self.window_queryset(cursor)[:limit])
+
+    def get_cursor_page(self, token=None, strict=False):
+        """Вернёт страницу, начинающуюся с позиции курсора.
+
+        Для неподходящего токена вернётся первая страница, а со
+        strict будет выброшен InvalidCursor.
+        """
+        cursor = None
+        if token:
+            try:
+                cursor = self.parse_cursor(token)
+            except InvalidCursor:
+                if strict:
+                    raise
+        window = CursorWindow(self, cursor)
+        page = self._get_page(window, 1, self)
+        page.is_cursor = True
+        page.cursor = window
+
+        return page
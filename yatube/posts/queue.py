@@ -0,0 +1,164 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import constants
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_executor = None
+_lock = threading.Lock()
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу очереди.
+
+    Аргументы задачи хранятся в JSON, поэтому передавать в неё
+    нужно id и строки, а не объекты моделей.
+    """
+    _registry[f'{func.__module__}.{func.__name__}'] = func
+
+    return func
+
+
+def enqueue(func, *args, key=None, delay=0):
+    """Ставит задачу в очередь и вернёт её запись.
+
+    Пока задача с тем же key ожидает или выполняется, повторная
+    постановка вернёт её, а не создаст новую. Задача запускается
+    в пуле потоков после фиксации транзакции; при
+    TASK_QUEUE_WORKERS = 0 - сразу в текущем потоке.
+    """
+    name = f'{func.__module__}.{func.__name__}'
+    if name not in _registry:
+        raise ValueError(f'{name} не зарегистрирована как задача.')
+    active = Task.objects.filter(
+        idempotency_key=key,
+        status__in=(Task.PENDING, Task.RUNNING)
+    )
+    if key is not None and active.exists():
+        return active.first()
+    try:
+        with transaction.atomic():
+            queued = Task.objects.create(
+                name=name,
+                payload=json.dumps(args),
+                idempotency_key=key,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        return active.first()
+    if delay:
+        return queued
+    if not settings.TASK_QUEUE_WORKERS:
+        run_task(queued.pk)
+    else:
+        transaction.on_commit(lambda: submit(queued.pk))
+
+    return queued
+
+
+def submit(task_id):
+    """Отдаёт задачу в локальный пул потоков."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TASK_QUEUE_WORKERS,
+                thread_name_prefix='tasks'
+            )
+    _executor.submit(_run_in_worker, task_id)
+
+
+def _run_in_worker(task_id):
+    try:
+        run_task(task_id)
+    finally:
+        connections.close_all()
+
+
+def _claimable(now):
+    # Ожидающие задачи, чей срок настал, и выполняемые, чей
+    # исполнитель пропал, не продлив аренду.
+    return Q(status=Task.PENDING, run_after__lte=now) | Q(
+        status=Task.RUNNING,
+        locked_until__lt=now
+    )
+
+
+def claim(task_id, now=None):
+    """Атомарно забирает задачу на выполнение, вернёт успех."""
+    now = now or timezone.now()
+
+    return bool(Task.objects.filter(
+        _claimable(now),
+        pk=task_id
+    ).update(
+        status=Task.RUNNING,
+        attempts=F('attempts') + 1,
+        locked_until=now + timedelta(seconds=constants.TASK_LEASE_SECONDS)
+    ))
+
+
+def due_task_ids(limit):
+    """id задач, которые пора выполнить, старые первыми."""
+    return list(Task.objects.filter(
+        _claimable(timezone.now())
+    ).order_by(
+        'run_after'
+    ).values_list(
+        'pk',
+        flat=True
+    )[:limit])
+
+
+def run_task(task_id):
+    """Выполняет задачу, если её удалось забрать.
+
+    Ошибка откладывает задачу с экспоненциальной задержкой, после
+    max_attempts попыток задача помечается как неудачная.
+    """
+    if not claim(task_id):
+        return False
+    queued = Task.objects.get(pk=task_id)
+    try:
+        with transaction.atomic():
+            _registry[queued.name](*json.loads(queued.payload))
+    except Exception as error:
+        logger.exception('Задача %s #%s упала', queued.name, queued.pk)
+        retry = queued.attempts < queued.max_attempts
+        delay = constants.TASK_RETRY_DELAY_SECONDS * 2 ** queued.attempts
+        Task.objects.filter(pk=task_id).update(
+            status=Task.PENDING if retry else Task.FAILED,
+            run_after=timezone.now() + timedelta(seconds=delay),
+            locked_until=None,
+            last_error=repr(error),
+            finished=None if retry else timezone.now(),
+        )
+        return False
+    Task.objects.filter(pk=task_id).update(
+        status=Task.DONE,
+        locked_until=None,
+        finished=timezone.now(),
+    )
+
+    return True
+
+
+def purge_finished(seconds=constants.TASK_KEEP_FINISHED_SECONDS):
+    """Удаляет выполненные задачи старше seconds секунд."""
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE,
+        finished__lt=timezone.now() - timedelta(seconds=seconds)
+    ).delete()
+
+    return deleted
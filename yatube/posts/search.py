@@ -0,0 +1,161 @@
+import re
+
+from django.db import connection, models
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from . import constants
+from .pagination import CursorPaginator
+
+# Непечатаемые маркеры подсветки: текст фрагмента экранируется
+# целиком, и только потом маркеры заменяются на <mark>.
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+# Управляющие символы FTS5 не принимает даже в кавычках.
+CONTROL_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+
+SEARCH_SQL = '''
+    WITH page AS (
+        SELECT post_id, MIN(score) AS score FROM (
+            SELECT rowid AS post_id, bm25(posts_post_fts) AS score
+            FROM posts_post_fts
+            WHERE posts_post_fts MATCH %s
+            UNION ALL
+            SELECT comment.post_id, bm25(posts_comment_fts) * %s
+            FROM posts_comment_fts
+            JOIN posts_comment AS comment
+                ON comment.id = posts_comment_fts.rowid
+            WHERE posts_comment_fts MATCH %s
+        )
+        GROUP BY post_id
+        {where}
+        ORDER BY score {order}, post_id {order}
+        LIMIT %s
+    )
+    SELECT post_id, MIN(score) AS score, snippet FROM (
+        SELECT
+            rowid AS post_id,
+            bm25(posts_post_fts) AS score,
+            snippet(posts_post_fts, 0, %s, %s, '…', %s) AS snippet
+        FROM posts_post_fts
+        WHERE posts_post_fts MATCH %s
+            AND rowid IN (SELECT post_id FROM page)
+        UNION ALL
+        SELECT
+            comment.post_id,
+            bm25(posts_comment_fts) * %s,
+            snippet(posts_comment_fts, 0, %s, %s, '…', %s)
+        FROM posts_comment_fts
+        JOIN posts_comment AS comment
+            ON comment.id = posts_comment_fts.rowid
+        WHERE posts_comment_fts MATCH %s
+            AND comment.post_id IN (SELECT post_id FROM page)
+    )
+    GROUP BY post_id
+    ORDER BY score {order}, post_id {order}
+'''
+
+
+def to_match_query(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5 MATCH.
+
+    Каждое слово берётся в кавычки, поэтому операторы FTS5 в вводе
+    не срабатывают, а все слова должны встретиться в тексте.
+    Управляющие символы заменяются пробелами и разделяют слова.
+    """
+    terms = CONTROL_RE.sub(' ', query).split()[:constants.SEARCH_MAX_TERMS]
+
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и подсвечивает найденные слова."""
+    return mark_safe(
+        escape(snippet).replace(
+            HIGHLIGHT_START,
+            '<mark>'
+        ).replace(
+            HIGHLIGHT_END,
+            '</mark>'
+        )
+    )
+
+
+def matching_post_ids(match):
+    """Подзапрос id постов, чей текст подходит под запрос MATCH."""
+    return RawSQL(
+        'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s',
+        (match,)
+    )
+
+
+def search_rows(match, cursor, limit):
+    """Строки (id поста, ранг, фрагмент) после позиции курсора.
+
+    Пост находится по своему тексту или тексту комментариев, из
+    нескольких совпадений берётся лучшее. Меньший ранг bm25 -
+    более релевантный результат. Ранжирование и отбор страницы идут
+    только по id и рангу, а фрагменты считаются для постов страницы.
+    """
+    where = ''
+    order = 'ASC'
+    cursor_params = []
+    if cursor is not None:
+        value, pk, reverse = cursor
+        where = 'HAVING (score, post_id) {} (%s, %s)'.format(
+            '<' if reverse else '>'
+        )
+        order = 'DESC' if reverse else 'ASC'
+        cursor_params = [value, pk]
+    snippet_params = [
+        HIGHLIGHT_START,
+        HIGHLIGHT_END,
+        constants.SEARCH_SNIPPET_TOKENS
+    ]
+    params = [
+        match,
+        constants.SEARCH_COMMENT_WEIGHT,
+        match,
+        *cursor_params,
+        limit,
+        *snippet_params,
+        match,
+        constants.SEARCH_COMMENT_WEIGHT,
+        *snippet_params,
+        match,
+    ]
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(SEARCH_SQL.format(where=where, order=order), params)
+        return db_cursor.fetchall()
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорный пагинатор результатов поиска по рангу bm25.
+
+    Позиция курсора - пара (ранг, id поста), поэтому глубина
+    страницы не влияет на её стоимость сверх самого поиска.
+    """
+
+    def __init__(self, object_list, per_page, query, **kwargs):
+        kwargs.setdefault('order_field', 'search_rank')
+        super().__init__(object_list, per_page, **kwargs)
+        self.match = to_match_query(query)
+
+    def get_order_field(self):
+        return models.FloatField()
+
+    def fetch_window(self, cursor, limit):
+        if not self.match:
+            return []
+        rows = search_rows(self.match, cursor, limit)
+        posts = self.object_list.in_bulk([row[0] for row in rows])
+        items = []
+        for post_id, score, snippet in rows:
+            post = posts.get(post_id)
+            if post is not None:
+                post.search_rank = score
+                post.snippet = highlight(snippet)
+                items.append(post)
+
+        return items
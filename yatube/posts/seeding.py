@@ -0,0 +1,260 @@
+import random
+from datetime import datetime, timedelta
+from io import BytesIO
+from itertools import islice
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from . import constants
+from .images import ingest_image
+from .importer import insert_rows
+from .models import Comment, Follow, Group, Post, User
+from .storage import post_image_storage
+from .tasks import schedule_thumbnails
+
+# Даты не зависят от момента запуска, чтобы набор повторялся.
+SEED_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+IMAGE_SIZE = (640, 480)
+
+
+def power_law_index(rng, count, exponent=constants.SEED_POWER_LAW_EXPONENT):
+    """Случайный индекс от 0 до count - 1 с распределением Ципфа.
+
+    Нулевой индекс выпадает чаще всех, частота убывает как
+    rank ** -exponent; exponent не может быть равен 1.
+    """
+    shape = 1 - exponent
+    rank = ((count ** shape - 1) * rng.random() + 1) ** (1 / shape)
+
+    return min(int(rank), count) - 1
+
+
+def _next_pk(model):
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+
+    return (last or 0) + 1
+
+
+class Seeder:
+    """Детерминированный генератор большого набора данных.
+
+    Каждый вид записей берёт случайные числа из своего потока,
+    поэтому при тех же seed и параметрах на пустой базе получается
+    тот же набор. id назначаются явно, а даты постов идут с равным
+    шагом, так что комментарии не требуют держать посты в памяти.
+    """
+
+    def __init__(self, users, groups, posts, comments, follows_per_user,
+                 images=0, image_ratio=0, seed=0, prefix='seed',
+                 batch_size=constants.SEED_BATCH_SIZE,
+                 chunk_size=constants.SEED_CHUNK_SIZE):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.comments = comments
+        self.follows_per_user = follows_per_user
+        self.images = images
+        self.image_ratio = image_ratio
+        self.seed = seed
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.step = timedelta(days=constants.SEED_DAYS) / max(posts, 1)
+        fake = Faker('ru_RU')
+        fake.seed_instance(seed)
+        self.vocabulary = sorted(set(
+            fake.words(nb=constants.SEED_VOCABULARY_SIZE)
+        ))
+        self.first_names = [
+            fake.first_name() for _ in range(constants.SEED_NAMES_POOL_SIZE)
+        ]
+        self.last_names = [
+            fake.last_name() for _ in range(constants.SEED_NAMES_POOL_SIZE)
+        ]
+
+    def rng(self, kind):
+        """Отдельный поток случайных чисел для вида записей."""
+        return random.Random(f'{self.seed}:{kind}')
+
+    def ranking(self, kind):
+        """Случайная перестановка пользователей: место -> индекс.
+
+        У авторства и подписок свои перестановки, иначе самые
+        плодовитые авторы оказались бы и самыми популярными, а
+        ленты их подписчиков - непропорционально большими.
+        """
+        ranking = list(range(self.users))
+        self.rng(kind).shuffle(ranking)
+
+        return ranking
+
+    def text(self, rng, min_words, max_words):
+        words = rng.choices(
+            self.vocabulary,
+            k=rng.randint(min_words, max_words)
+        )
+
+        return ' '.join(words).capitalize() + '.'
+
+    def pub_date(self, index):
+        """Дата поста с порядковым номером index."""
+        return SEED_EPOCH + self.step * index
+
+    def usernames_taken(self):
+        return User.objects.filter(
+            username__startswith=self.prefix
+        ).exists()
+
+    def iter_users(self):
+        rng = self.rng('users')
+        for index in range(self.users):
+            yield User(
+                pk=self.user_start + index,
+                username=f'{self.prefix}{index:07d}',
+                first_name=rng.choice(self.first_names),
+                last_name=rng.choice(self.last_names),
+                # Пароль, начинающийся с "!", Django считает неиспользуемым.
+                password='!',
+                date_joined=SEED_EPOCH,
+            )
+
+    def iter_groups(self):
+        rng = self.rng('groups')
+        for index in range(self.groups):
+            yield Group(
+                pk=self.group_start + index,
+                title=f'{rng.choice(self.vocabulary).capitalize()} {index}',
+                slug=f'{self.prefix}-{index:05d}',
+                description=self.text(rng, 5, 20),
+            )
+
+    def iter_follows(self):
+        rng = self.rng('follows')
+        ranking = self.ranking('followee_ranks')
+        for index in range(self.users):
+            wanted = min(
+                int(rng.expovariate(1 / self.follows_per_user)),
+                self.users - 1
+            )
+            authors = set()
+            # Популярные авторы выпадают часто, число попыток ограничено.
+            for _ in range(wanted * 3):
+                if len(authors) == wanted:
+                    break
+                author = ranking[power_law_index(rng, self.users)]
+                if author != index:
+                    authors.add(author)
+            for author in sorted(authors):
+                yield Follow(
+                    user_id=self.user_start + index,
+                    author_id=self.user_start + author,
+                )
+
+    def make_images(self):
+        """Имена сгенерированных картинок."""
+        rng = self.rng('images')
+        names = []
+        for index in range(self.images):
+            image = Image.new(
+                'RGB',
+                IMAGE_SIZE,
+                tuple(rng.randrange(256) for _ in range(3))
+            )
+            draw = ImageDraw.Draw(image)
+            for _ in range(5):
+                x = rng.randrange(IMAGE_SIZE[0])
+                y = rng.randrange(IMAGE_SIZE[1])
+                draw.rectangle(
+                    (x, y, x + rng.randrange(200), y + rng.randrange(200)),
+                    fill=tuple(rng.randrange(256) for _ in range(3))
+                )
+            source = BytesIO()
+            image.save(source, 'PNG')
+            upload = ContentFile(source.getvalue(), name=f'seed-{index}.png')
+            jpeg = ingest_image(upload)
+            name = post_image_storage.save(f'posts/{jpeg.name}', jpeg)
+            # Посты создаются bulk_create без сигналов, поэтому миниатюры
+            # ставятся в очередь здесь.
+            schedule_thumbnails(name)
+            names.append(name)
+
+        return names
+
+    def iter_posts(self):
+        rng = self.rng('posts')
+        ranking = self.ranking('author_ranks')
+        images = self.make_images() if self.image_ratio else []
+        for index in range(self.posts):
+            group_id = None
+            if self.groups and rng.random() < constants.SEED_GROUP_SHARE:
+                group_id = self.group_start + power_law_index(
+                    rng,
+                    self.groups
+                )
+            image = ''
+            if images and rng.random() < self.image_ratio:
+                image = images[rng.randrange(len(images))]
+            yield Post(
+                pk=self.post_start + index,
+                author_id=self.user_start + ranking[
+                    power_law_index(rng, self.users)
+                ],
+                group_id=group_id,
+                text=self.text(rng, 5, 60),
+                pub_date=self.pub_date(index),
+                image=image,
+            )
+
+    def iter_comments(self):
+        rng = self.rng('comments')
+        for index in range(self.comments):
+            # Свежие посты комментируют чаще старых.
+            post = self.posts - 1 - power_law_index(rng, self.posts)
+            yield Comment(
+                pk=self.comment_start + index,
+                post_id=self.post_start + post,
+                author_id=self.user_start + rng.randrange(self.users),
+                text=self.text(rng, 3, 30),
+                created=self.pub_date(post) + timedelta(
+                    seconds=rng.randrange(60, 60 * 60 * 24)
+                ),
+            )
+
+    def write(self, model, objects):
+        """Пишет объекты пачками, по транзакции на chunk_size строк.
+
+        После каждой транзакции отдаёт число записанных строк.
+        """
+        objects = iter(objects)
+        written = 0
+        while True:
+            chunk = list(islice(objects, self.chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                written += insert_rows(model, chunk, self.batch_size)
+            yield written
+
+    def run(self):
+        """Создаёт набор, после каждой транзакции отдаёт прогресс.
+
+        Генератор выдаёт пары (модель, записано строк этой модели).
+        """
+        self.user_start = _next_pk(User)
+        self.group_start = _next_pk(Group)
+        self.post_start = _next_pk(Post)
+        self.comment_start = _next_pk(Comment)
+        steps = [(User, self.iter_users()), (Group, self.iter_groups())]
+        if self.users and self.follows_per_user:
+            steps.append((Follow, self.iter_follows()))
+        if self.users:
+            steps.append((Post, self.iter_posts()))
+        if self.users and self.posts:
+            steps.append((Comment, self.iter_comments()))
+        for model, objects in steps:
+            for written in self.write(model, objects):
+                yield model, written
@@ -0,0 +1,245 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, tasks
+from .autocomplete import invalidate_indexes
+from .feed_cache import SITE, bump_versions
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+from .queue import enqueue
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков."""
+    if created:
+        enqueue(
+            tasks.fan_out_post,
+            instance.pk,
+            key=f'fan_out:{instance.pk}'
+        )
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """Заполняет ленту подписчика постами нового автора."""
+    if created:
+        enqueue(
+            tasks.backfill_follow,
+            instance.user_id,
+            instance.author_id,
+            key=f'backfill:{instance.pk}'
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Очищает ленту от постов автора после отписки."""
+    enqueue(
+        tasks.prune_follow,
+        instance.user_id,
+        instance.author_id,
+        key=f'prune:{instance.pk}'
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+def feed_changed(sender, **kwargs):
+    """Сбрасывает кэш ленты при изменении постов и комментариев."""
+    bump_versions('feed')
+
+
+@receiver(pre_save, sender=Post)
+def post_previous_values(sender, instance, raw, **kwargs):
+    """Запоминает прежние группу и картинку изменяемого поста.
+
+    Одна выборка прежней строки нужна и валидаторам страниц старой
+    группы, и удалению заменённого файла картинки.
+    """
+    if raw or instance.pk is None:
+        return
+    previous = Post.objects.filter(
+        pk=instance.pk
+    ).values_list(
+        'group_id',
+        'image'
+    ).first()
+    if previous is None:
+        return
+    old_group_id, old_image = previous
+    if old_group_id and old_group_id != instance.group_id:
+        instance._old_group_id = old_group_id
+    if old_image and old_image != instance.image.name:
+        instance._replaced_images = [old_image]
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_pages_changed(sender, instance, **kwargs):
+    """Меняет валидаторы страниц поста, его автора и групп."""
+    scopes = [f'post:{instance.pk}', f'author:{instance.author_id}']
+    for group_id in (
+        instance.group_id,
+        instance.__dict__.pop('_old_group_id', None),
+    ):
+        if group_id:
+            scopes.append(f'group:{group_id}')
+    bump_versions(*scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_pages_changed(sender, instance, **kwargs):
+    """Меняет валидаторы страницы поста с комментарием."""
+    bump_versions(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_pages_changed(sender, instance, **kwargs):
+    """Меняет валидаторы профилей: счётчики и кнопка подписки."""
+    bump_versions(
+        f'author:{instance.author_id}',
+        f'author:{instance.user_id}'
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def site_changed(sender, **kwargs):
+    """Меняет валидаторы всех страниц после изменения групп."""
+    bump_versions(SITE)
+
+
+@receiver(post_save, sender=User)
+def user_renamed(sender, instance, created, update_fields, **kwargs):
+    """Меняет валидаторы всех страниц, если изменилось имя автора."""
+    shown = {'username', 'first_name', 'last_name'}
+    if not created and (update_fields is None or shown & set(update_fields)):
+        bump_versions(SITE)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    """Заводит счётчики для нового пользователя."""
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_counted(sender, instance, created, **kwargs):
+    """Увеличивает счётчик постов автора."""
+    if created:
+        counters.post_added(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_uncounted(sender, instance, **kwargs):
+    """Уменьшает счётчик постов автора."""
+    counters.post_added(instance, delta=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_counted(sender, instance, created, **kwargs):
+    """Увеличивает счётчик комментариев поста."""
+    if created:
+        counters.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_uncounted(sender, instance, **kwargs):
+    """Уменьшает счётчик комментариев поста."""
+    counters.comment_added(instance, delta=-1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_counted(sender, instance, created, **kwargs):
+    """Увеличивает счётчики подписчиков и подписок."""
+    if created:
+        counters.follow_added(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_uncounted(sender, instance, **kwargs):
+    """Уменьшает счётчики подписчиков и подписок."""
+    counters.follow_added(instance, delta=-1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_limit_crossed(sender, instance, created=False, **kwargs):
+    """Перестраивает ленты, когда автор пересекает порог раскладки.
+
+    Счётчики меняются на единицу, поэтому пересечение видно по
+    новому значению. Обработчик идёт после follow_counted.
+    """
+    if kwargs['signal'] is post_save and not created:
+        return
+    limit = settings.TIMELINE_FANOUT_FOLLOWER_LIMIT
+    crossed = limit + 1 if created else limit
+    if AuthorStats.objects.filter(
+        user_id=instance.author_id,
+        follower_count=crossed
+    ).exists():
+        enqueue(
+            tasks.rebalance_author,
+            instance.author_id,
+            key=f'rebalance:{instance.author_id}'
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_image_saved(sender, instance, **kwargs):
+    """Ставит в очередь генерацию миниатюр картинки поста."""
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: tasks.schedule_thumbnails(name))
+
+
+def _release_on_commit(names):
+    # Задача ставится после фиксации: до неё на файл ещё ссылается
+    # удаляемая или изменяемая строка.
+    for name in names:
+        if name:
+            transaction.on_commit(
+                lambda name=name: enqueue(tasks.release_image, name)
+            )
+
+
+@receiver(post_save, sender=Post)
+def post_image_released(sender, instance, **kwargs):
+    """Удаляет заменённые файлы, если на них больше нет ссылок."""
+    _release_on_commit(instance.__dict__.pop('_replaced_images', ()))
+
+
+@receiver(post_delete, sender=Post)
+def post_image_deleted(sender, instance, **kwargs):
+    """Удаляет файлы удалённого поста, если на них больше нет ссылок."""
+    _release_on_commit((instance.image.name,))
+
+
+@receiver(post_save, sender=User)
+def user_indexed(sender, instance, created, update_fields, **kwargs):
+    """Обновляет подсказки для нового или переименованного пользователя.
+
+    Перестраивать индексы нужно только ради активного нового
+    пользователя и после изменения проиндексированных полей.
+    """
+    indexed = {'username', 'first_name', 'last_name', 'is_active'}
+    if created and not instance.is_active:
+        return
+    if created or update_fields is None or indexed & set(update_fields):
+        invalidate_indexes()
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def autocomplete_changed(sender, **kwargs):
+    """Перестраивает подсказки после изменения групп и пользователей."""
+    invalidate_indexes()
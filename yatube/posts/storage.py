@@ -0,0 +1,77 @@
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK_SIZE = 64 * 1024
+HASHED_NAME_RE = re.compile(r'[0-9a-f]{64}(\.\w+)?')
+
+
+def file_digest(content):
+    """SHA-256 содержимого файла, прочитанного по частям."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, где имя файла - хэш его содержимого.
+
+    Одинаковые загрузки попадают в один и тот же файл
+    posts/ab/cd/abcd....jpg, поэтому повторная загрузка не пишет
+    ничего на диск и переиспользует уже созданные миниатюры.
+    Каталог из upload_to сохраняется, а два уровня подкаталогов
+    из первых символов хэша не дают каталогу разрастись.
+    """
+
+    def hashed_name(self, name, digest):
+        """Имя файла с содержимым digest в каталоге исходного name."""
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+
+        return os.path.join(
+            directory,
+            digest[:2],
+            digest[2:4],
+            f'{digest}{extension}'
+        )
+
+    def is_content_addressed(self, name):
+        """Получено ли имя из хэша содержимого.
+
+        Картинки, загруженные до хранения по хэшу, сохранили прежние
+        имена, и по имени их содержимое не определить.
+        """
+        return bool(HASHED_NAME_RE.fullmatch(os.path.basename(name)))
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым, суффиксы против коллизий
+        # не нужны: совпадение имён означает совпадение файлов.
+        return name
+
+    def _save(self, name, content):
+        # images импортирует это хранилище через модели.
+        from .images import lock_image
+
+        name = self.hashed_name(name, file_digest(content))
+        # Под блокировкой release_image не удалит файл между проверкой
+        # и вставкой поста, который на него сошлётся.
+        lock_image(name)
+        if self.exists(name):
+            return name
+        # Пишем во временный файл и атомарно переименовываем, чтобы
+        # параллельные загрузки одного файла не мешали друг другу.
+        temp_name = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temp_name), self.path(name))
+
+        return name
+
+
+post_image_storage = ContentAddressedStorage()
@@ -0,0 +1,52 @@
+from . import images, thumbnail_cache, timeline
+from .models import Follow, Post
+from .queue import enqueue, task
+
+
+@task
+def fan_out_post(post_id):
+    """Раскладывает пост по лентам подписчиков автора."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        timeline.fan_out_post(post)
+
+
+@task
+def backfill_follow(user_id, author_id):
+    """Заполняет ленту подписчика, если подписка ещё действует."""
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        timeline.backfill_follow(user_id, author_id)
+
+
+@task
+def rebalance_author(author_id):
+    """Перестраивает ленты после пересечения автором порога раскладки."""
+    timeline.rebalance_author(author_id)
+
+
+@task
+def prune_follow(user_id, author_id):
+    """Чистит ленту после отписки, если пользователь не подписался снова."""
+    if not Follow.objects.filter(
+        user_id=user_id,
+        author_id=author_id
+    ).exists():
+        timeline.prune_follow(user_id, author_id)
+
+
+@task
+def build_thumbnails(name):
+    """Кладёт миниатюры картинки поста в дисковый кэш."""
+    thumbnail_cache.build_thumbnails(name)
+
+
+@task
+def release_image(name):
+    """Удаляет файл картинки, на который больше нет ссылок."""
+    images.release_image(name)
+
+
+def schedule_thumbnails(name):
+    """Ставит генерацию миниатюр картинки в очередь задач."""
+    if name:
+        enqueue(build_thumbnails, name, key=f'thumbnails:{name}')
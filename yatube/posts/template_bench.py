@@ -0,0 +1,297 @@
+import statistics
+import time
+import tracemalloc
+from copy import deepcopy
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Paginator
+from django.db import connection
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from . import constants
+from .models import AuthorStats, Group, Post, User
+
+# Контексты не зависят от базы и момента запуска, поэтому отчёты
+# разных коммитов можно сравнивать между собой.
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+POST_TEXT = (
+    'Утро выдалось тихим, и кот долго смотрел в окно на снег.\n'
+    'Потом он спрыгнул с подоконника и ушёл на кухню.\n\n'
+    'Вечером снег растаял, а кот так и не вернулся к окну: '
+    'у миски было интереснее.'
+)
+
+
+class Fixture:
+    """Неизменные объекты контекстов: автор, читатель, группа и посты.
+
+    Объекты не сохраняются в базу. Адрес миниатюры шаблоны строят
+    без обращения к базе и кэшу.
+    """
+
+    def __init__(self, cards, image_ratio):
+        self.author = User(
+            pk=1,
+            username='leo',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+        self.author.stats = AuthorStats(
+            post_count=cards,
+            follower_count=12,
+            following_count=3,
+        )
+        self.member = User(pk=2, username='ann')
+        self.group = Group(
+            pk=1,
+            title='Кошки',
+            slug='cats',
+            description='Про кошек',
+        )
+        with_image = [
+            int((index + 1) * image_ratio) > int(index * image_ratio)
+            for index in range(cards)
+        ]
+        self.posts = [
+            self.make_post(index, image, self.group if index % 2 else None)
+            for index, image in enumerate(with_image)
+        ]
+        # На странице группы все посты из этой группы.
+        self.group_posts = [
+            self.make_post(index, image, self.group)
+            for index, image in enumerate(with_image)
+        ]
+
+    def make_post(self, index, with_image, group):
+        post = Post(
+            pk=index + 1,
+            author=self.author,
+            group=group,
+            text=POST_TEXT,
+            pub_date=EPOCH + timedelta(hours=index),
+            comment_count=index % 7,
+        )
+        if with_image:
+            post.image = f'posts/00/00/{index:064x}.jpg'
+
+        return post
+
+    def page(self, cards, posts=None):
+        posts = self.posts if posts is None else posts
+
+        return Paginator(posts[:cards], max(cards, 1)).page(1)
+
+
+def index_page(fixture, cards):
+    return 'posts/index.html', reverse('posts:index'), None, {
+        'page_obj': fixture.page(cards),
+        'page_version': 0,
+        'cache_timeout': 0,
+    }
+
+
+def group_page(fixture, cards):
+    url = reverse('posts:group_list', args=[fixture.group.slug])
+
+    return 'posts/group_list.html', url, None, {
+        'group': fixture.group,
+        'page_obj': fixture.page(cards, fixture.group_posts),
+    }
+
+
+def profile_page(fixture, cards):
+    url = reverse('posts:profile', args=[fixture.author.username])
+
+    return 'posts/profile.html', url, None, {
+        'author': fixture.author,
+        'page_obj': fixture.page(cards),
+        'followind': False,
+    }
+
+
+def follow_page(fixture, cards):
+    url = reverse('posts:follow_index')
+
+    return 'posts/follow.html', url, fixture.member, {
+        'page_obj': fixture.page(cards),
+    }
+
+
+PAGES = {
+    'index': index_page,
+    'group_list': group_page,
+    'profile': profile_page,
+    'follow': follow_page,
+}
+
+
+def bench_settings():
+    """Настройки, при которых замеряется только отрисовка.
+
+    Шаблоны компилируются один раз кэширующим загрузчиком, а кэш
+    фрагментов отключён, чтобы каждая отрисовка была полной.
+    """
+    engine = deepcopy(settings.TEMPLATES[0])
+    engine['APP_DIRS'] = False
+    engine['OPTIONS'] = {
+        **engine.get('OPTIONS', {}),
+        'debug': False,
+        'loaders': [(
+            'django.template.loaders.cached.Loader',
+            [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]
+        )],
+    }
+
+    return override_settings(
+        TEMPLATES=[engine],
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }}
+    )
+
+
+def make_render(page, fixture, cards):
+    """Функция без аргументов, отрисовывающая страницу."""
+    template_name, url, user, context = PAGES[page](fixture, cards)
+    template = get_template(template_name)
+    request = RequestFactory().get(url)
+    request.user = user or AnonymousUser()
+    request.resolver_match = resolve(url)
+
+    return lambda: template.render(context, request)
+
+
+def time_render(render, rounds, min_round_seconds):
+    """Время одной отрисовки в секундах: минимум и медиана по раундам.
+
+    Число отрисовок в раунде подбирается так, чтобы раунд длился
+    не меньше min_round_seconds.
+    """
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            render()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_seconds:
+            break
+        number *= 2
+    timings = [elapsed / number]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            render()
+        timings.append((time.perf_counter() - started) / number)
+
+    return min(timings), statistics.median(timings)
+
+
+def peak_allocation(render):
+    """Пик памяти, выделенной Python за одну отрисовку, в байтах."""
+    tracemalloc.start()
+    try:
+        render()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        render()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return peak - baseline
+
+
+def _slope(points):
+    """Наклон прямой по крайним точкам: прирост на одну карточку."""
+    (first_cards, first), (last_cards, last) = points[0], points[-1]
+    if last_cards == first_cards:
+        return None
+
+    return (last - first) / (last_cards - first_cards)
+
+
+def run_benchmarks(
+    pages=tuple(PAGES),
+    cards=constants.TEMPLATE_BENCH_CARDS,
+    rounds=constants.TEMPLATE_BENCH_ROUNDS,
+    min_round_seconds=constants.TEMPLATE_BENCH_MIN_ROUND_SECONDS,
+    image_ratio=0.5
+):
+    """Замеряет отрисовку страниц с разным числом карточек постов."""
+    cards = sorted(set(cards))
+    fixture = Fixture(max(cards), image_ratio)
+    report = {'image_ratio': image_ratio, 'pages': {}}
+    with bench_settings():
+        for page in pages:
+            results = {}
+            for count in cards:
+                render = make_render(page, fixture, count)
+                with CaptureQueriesContext(connection) as queries:
+                    render()
+                best, median = time_render(render, rounds, min_round_seconds)
+                results[str(count)] = {
+                    'render_us': round(best * 1e6, 2),
+                    'median_us': round(median * 1e6, 2),
+                    'peak_alloc_bytes': peak_allocation(render),
+                    'queries': len(queries),
+                }
+            per_card_us = _slope([
+                (count, results[str(count)]['render_us']) for count in cards
+            ])
+            per_card_alloc = _slope([
+                (count, results[str(count)]['peak_alloc_bytes'])
+                for count in cards
+            ])
+            report['pages'][page] = {
+                'cards': results,
+                'per_card_us': (
+                    round(per_card_us, 2) if per_card_us is not None else None
+                ),
+                'per_card_alloc_bytes': (
+                    round(per_card_alloc) if per_card_alloc is not None
+                    else None
+                ),
+            }
+
+    return report
+
+
+def find_regressions(report, baseline,
+                     threshold=constants.TEMPLATE_BENCH_THRESHOLD):
+    """Замеры, ставшие медленнее базовых больше чем на threshold.
+
+    Вернёт список (замер, было, стало), сравниваются только замеры,
+    которые есть в обоих отчётах.
+    """
+    regressions = []
+    for page, current in report['pages'].items():
+        previous = baseline.get('pages', {}).get(page)
+        if previous is None:
+            continue
+        pairs = [(
+            f'{page}:per_card_us',
+            previous.get('per_card_us'),
+            current['per_card_us'],
+        )]
+        for count, result in current['cards'].items():
+            old = previous['cards'].get(count)
+            if old is not None:
+                pairs.append((
+                    f'{page}:cards={count}:render_us',
+                    old['render_us'],
+                    result['render_us'],
+                ))
+        for name, old, new in pairs:
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append((name, old, new))
+
+    return regressions
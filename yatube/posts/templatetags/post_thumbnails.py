@@ -0,0 +1,15 @@
+from django import template
+from django.urls import reverse
+
+from ..thumbnail_cache import thumbnail_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(image, size):
+    """Адрес posts:thumbnail с текущей версией размера."""
+    return reverse(
+        'posts:thumbnail',
+        args=[size, thumbnail_version(size), image.name]
+    )
@@ -0,0 +1,178 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..constants import API_PAGE_SIZE
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    """JSON API только для чтения."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='leo',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+        cls.reader = User.objects.create_user(username='ann')
+        cls.group = Group.objects.create(
+            title='Кошки',
+            slug='cats',
+            description='Про кошек',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+                text=f'Пост {number}',
+            )
+            for number in range(API_PAGE_SIZE + 5)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.reader,
+            text='Комментарий',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get_json(self, url, client=None, status=200):
+        response = (client or self.client).get(url)
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        return json.loads(response.content)
+
+    def test_posts_cursor_pagination(self):
+        """Лента отдаётся страницами по курсору, новые посты первыми."""
+        url = reverse('api_v1:posts')
+        first = self.get_json(url)
+        self.assertEqual(len(first['results']), API_PAGE_SIZE)
+        self.assertIsNone(first['previous'])
+        second = self.get_json(f'{url}?cursor={first["next"]}')
+        ids = [row['id'] for row in first['results'] + second['results']]
+        expected = [post.pk for post in reversed(self.posts)]
+        self.assertEqual(ids, expected)
+        self.assertIsNone(second['next'])
+
+    def test_foreign_cursor_rejected(self):
+        """Курсор другого списка или мусор дают 400 с JSON."""
+        first = self.get_json(reverse('api_v1:posts'))
+        for token in (first['next'], 'broken'):
+            with self.subTest(token=token):
+                data = self.get_json(
+                    f'{reverse("api_v1:groups")}?cursor={token}',
+                    status=400
+                )
+                self.assertIn('detail', data)
+
+    def test_post_serialization(self):
+        """Пост содержит автора, группу и счётчик комментариев."""
+        data = self.get_json(
+            reverse('api_v1:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(data, {
+            'id': self.post.pk,
+            'text': self.post.text,
+            'pub_date': self.post.pub_date.isoformat(),
+            'author': 'leo',
+            'author_name': 'Лев Толстой',
+            'group': None,
+            'group_title': None,
+            'image': None,
+            'comment_count': 1,
+        })
+
+    def test_filtered_feeds(self):
+        """Посты группы и автора берутся из их выборок."""
+        group_posts = self.get_json(
+            reverse('api_v1:group_posts', args=['cats'])
+        )['results']
+        self.assertEqual(
+            [row['id'] for row in group_posts],
+            [post.pk for post in reversed(self.posts) if post.group_id]
+        )
+        profile_posts = self.get_json(
+            reverse('api_v1:profile_posts', args=['leo'])
+        )['results']
+        self.assertEqual(len(profile_posts), API_PAGE_SIZE)
+
+    def test_objects(self):
+        """Группа, профиль и комментарии отдаются своими словарями."""
+        self.assertEqual(
+            self.get_json(reverse('api_v1:group_detail', args=['cats'])),
+            {'slug': 'cats', 'title': 'Кошки', 'description': 'Про кошек'}
+        )
+        profile = self.get_json(reverse('api_v1:profile', args=['leo']))
+        self.assertEqual(profile['post_count'], len(self.posts))
+        comments = self.get_json(
+            reverse('api_v1:post_comments', args=[self.post.pk])
+        )
+        self.assertEqual(comments['results'][0]['author'], 'ann')
+        groups = self.get_json(reverse('api_v1:groups'))
+        self.assertEqual(groups['results'][0]['slug'], 'cats')
+
+    def test_not_found_is_json(self):
+        """Несуществующий объект - 404 в JSON."""
+        for url in (
+            reverse('api_v1:post_detail', args=[0]),
+            reverse('api_v1:post_comments', args=[0]),
+            reverse('api_v1:group_posts', args=['missing']),
+            reverse('api_v1:profile', args=['missing']),
+        ):
+            with self.subTest(url=url):
+                self.assertIn('detail', self.get_json(url, status=404))
+
+    def test_read_only(self):
+        """API принимает только безопасные методы."""
+        response = self.client.post(reverse('api_v1:posts'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_gzip(self):
+        """Ответ сжимается, если клиент принимает gzip."""
+        response = self.client.get(
+            reverse('api_v1:posts'),
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['results']), API_PAGE_SIZE)
+
+    def test_follow_requires_login(self):
+        """Лента подписок доступна только авторизованным."""
+        self.get_json(reverse('api_v1:follow'), status=401)
+        Follow.objects.create(user=self.reader, author=self.author)
+        data = self.get_json(reverse('api_v1:follow'), self.reader_client)
+        self.assertEqual(
+            [row['id'] for row in data['results']],
+            [post.pk for post in reversed(self.posts)][:API_PAGE_SIZE]
+        )
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=0)
+    def test_follow_merges_pulled_authors(self):
+        """Посты популярных авторов подмешиваются в ленту подписок."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.clear()
+        url = reverse('api_v1:follow')
+        first = self.get_json(url, self.reader_client)
+        second = self.get_json(
+            f'{url}?cursor={first["next"]}',
+            self.reader_client
+        )
+        self.assertEqual(
+            [row['id'] for row in first['results'] + second['results']],
+            [post.pk for post in reversed(self.posts)]
+        )
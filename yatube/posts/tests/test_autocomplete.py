@@ -0,0 +1,157 @@
+from random import Random
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .. import constants
+from ..autocomplete import (
+    SCOPE,
+    PrefixIndex,
+    get_indexes,
+    invalidate_indexes
+)
+from ..models import Follow, Group, PageStamp
+
+User = get_user_model()
+
+
+class AutocompleteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.quiet = User.objects.create_user(username='anna')
+        cls.popular = User.objects.create_user(
+            username='Annette',
+            first_name='Аннет',
+        )
+        User.objects.create_user(username='boris')
+        for number in range(3):
+            follower = User.objects.create_user(username=f'reader{number}')
+            Follow.objects.create(user=follower, author=cls.popular)
+        cls.group = Group.objects.create(
+            title='Анимация',
+            slug='animation',
+            description='Мультфильмы',
+        )
+
+    def setUp(self):
+        # Индексы живут в процессе и переживают откат базы после теста.
+        invalidate_indexes()
+
+    def suggest(self, query):
+        return self.client.get(
+            reverse('posts:autocomplete'),
+            {'q': query}
+        ).json()
+
+    def test_users_matched_by_prefix_popular_first(self):
+        """Пользователи ищутся по префиксу, популярные выше."""
+        users = self.suggest('AN')['users']
+        self.assertEqual(
+            [user['username'] for user in users],
+            ['Annette', 'anna']
+        )
+        self.assertEqual(users[0]['full_name'], 'Аннет')
+        self.assertEqual(
+            users[0]['url'],
+            reverse('posts:profile', args=['Annette'])
+        )
+
+    def test_groups_matched_by_slug(self):
+        """Группы ищутся по началу slug."""
+        groups = self.suggest('ani')['groups']
+        self.assertEqual([group['slug'] for group in groups], ['animation'])
+
+    def test_empty_query(self):
+        """Пустой запрос ничего не ищет."""
+        self.assertEqual(self.suggest(' '), {'users': [], 'groups': []})
+
+    def test_warm_index_needs_no_queries(self):
+        """Прогретый индекс отвечает без запросов к базе."""
+        get_indexes()
+        with self.assertNumQueries(0):
+            self.suggest('an')
+
+    def test_new_user_appears_after_invalidation(self):
+        """Новый пользователь сразу попадает в подсказки."""
+        self.suggest('zo')
+        User.objects.create_user(username='zoe')
+        users = self.suggest('zo')['users']
+        self.assertEqual([user['username'] for user in users], ['zoe'])
+
+    def test_version_shared_through_database(self):
+        """Отметка в базе перестраивает индекс и в других процессах."""
+        self.suggest('zo')
+        User.objects.bulk_create([User(username='zoe')])
+        # Так изменение видит процесс, в котором не было сигнала.
+        PageStamp.objects.filter(scope=SCOPE).update(
+            version=F('version') + 1
+        )
+        with mock.patch.object(
+            constants,
+            'AUTOCOMPLETE_VERSION_CHECK_SECONDS',
+            0
+        ):
+            users = self.suggest('zo')['users']
+        self.assertEqual([user['username'] for user in users], ['zoe'])
+
+    def test_version_checked_periodically(self):
+        """Между проверками версии индекс не обращается к базе."""
+        self.suggest('an')
+        invalidate_indexes()
+        # Отметка в базе и перестройка индексов пользователей и групп.
+        with self.assertNumQueries(3):
+            self.suggest('an')
+        with self.assertNumQueries(0):
+            self.suggest('an')
+
+    def test_renamed_user_rebuilds_index(self):
+        """Переименование перестраивает индекс."""
+        self.suggest('an')
+        user = User.objects.get(username='boris')
+        user.username = 'andrey'
+        user.save(update_fields=['username'])
+        users = self.suggest('andr')['users']
+        self.assertEqual([user['username'] for user in users], ['andrey'])
+
+
+class PrefixIndexTest(SimpleTestCase):
+    def setUp(self):
+        rng = Random(1)
+        self.entries = [
+            (
+                ''.join(rng.choice('abc') for _ in range(rng.randint(1, 5))),
+                rng.randint(0, 100),
+                number,
+            )
+            for number in range(300)
+        ]
+
+    def expected(self, entries, prefix, limit):
+        matched = sorted(
+            (entry for entry in entries if entry[0].startswith(prefix)),
+            key=lambda entry: -entry[1]
+        )
+
+        return sorted(entry[1] for entry in matched[:limit])
+
+    def weights(self, index, prefix, limit):
+        by_payload = {entry[2]: entry[1] for entry in index.entries}
+
+        return sorted(
+            by_payload[payload] for payload in index.search(prefix, limit)
+        )
+
+    def test_search_matches_full_scan(self):
+        """Заранее посчитанные и обычные префиксы дают верный ответ."""
+        index = PrefixIndex(self.entries, limit=5)
+        for prefix in ('a', 'bc', 'cab', 'abca', 'ccccc', 'd'):
+            for limit in (3, 5, 8):
+                with self.subTest(prefix=prefix, limit=limit):
+                    self.assertEqual(
+                        self.weights(index, prefix, limit),
+                        self.expected(self.entries, prefix, limit)
+                    )
@@ -0,0 +1,178 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, PageStamp, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    """Повторные запросы неизменных страниц получают 304."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='ann')
+        cls.group = Group.objects.create(
+            title='Кошки',
+            slug='cats',
+            description='Про кошек',
+        )
+        cls.other_group = Group.objects.create(
+            title='Собаки',
+            slug='dogs',
+            description='Про собак',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Пост в группе',
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Данные созданы в прошлом: секунда изменения закончилась.
+        PageStamp.objects.update(
+            modified=timezone.now() - timedelta(minutes=1)
+        )
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def pages(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['cats']),
+            reverse('posts:profile', args=['leo']),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def test_unchanged_page_not_modified(self):
+        """Неизменная страница отвечает 304 без шаблона и выборки постов."""
+        for url in self.pages():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('Last-Modified', response)
+                self.assertIn('no-cache', response['Cache-Control'])
+                with CaptureQueriesContext(connection) as queries:
+                    repeated = self.client.get(
+                        url,
+                        HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(repeated.status_code, 304)
+                self.assertEqual(repeated.templates, [])
+                # Объект страницы и отметки её областей.
+                self.assertLessEqual(len(queries), 2)
+
+    def test_if_modified_since(self):
+        """Last-Modified принимается в If-Modified-Since."""
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        repeated = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(repeated.status_code, 304)
+
+    def test_validators_shared_between_processes(self):
+        """Валидаторы берутся из базы, а не из кэша процесса."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        cache.clear()
+        repeated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeated.status_code, 304)
+
+    def test_change_in_current_second(self):
+        """Свежее изменение не объявляется в Last-Modified."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        Comment.objects.create(
+            post=self.post,
+            author=self.reader,
+            text='Комментарий',
+        )
+        repeated = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(repeated.status_code, 200)
+        self.assertNotIn('Last-Modified', repeated)
+        self.assertNotEqual(repeated['ETag'], response['ETag'])
+
+    def test_validators_depend_on_user(self):
+        """Страницы гостя и пользователя имеют разные ETag."""
+        url = reverse('posts:profile', args=['leo'])
+        self.assertNotEqual(
+            self.client.get(url)['ETag'],
+            self.reader_client.get(url)['ETag']
+        )
+
+    def move_post(self):
+        self.post.group = self.other_group
+        self.post.save()
+
+    def rename_author(self):
+        self.author.first_name = 'Лев'
+        self.author.save()
+
+    def test_save_reads_previous_row_once(self):
+        """Сохранение поста выбирает его прежнюю строку один раз."""
+        with CaptureQueriesContext(connection) as queries:
+            self.move_post()
+        selects = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "posts_post"' in query['sql']
+        ]
+        self.assertEqual(len(selects), 1)
+
+    def test_changes_invalidate_pages(self):
+        """Изменения данных страницы снова отдают её целиком."""
+        cases = (
+            (
+                reverse('posts:post_detail', args=[self.post.pk]),
+                lambda: Comment.objects.create(
+                    post=self.post,
+                    author=self.reader,
+                    text='Комментарий',
+                )
+            ),
+            (
+                reverse('posts:profile', args=['leo']),
+                lambda: Follow.objects.create(
+                    user=self.reader,
+                    author=self.author,
+                )
+            ),
+            (reverse('posts:group_list', args=['cats']), self.move_post),
+            (reverse('posts:index'), self.rename_author),
+        )
+        for url, change in cases:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                change()
+                repeated = self.reader_client.get(
+                    url,
+                    HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(repeated.status_code, 200)
+
+    def test_other_post_keeps_detail_valid(self):
+        """Комментарий к другому посту не сбрасывает страницу поста."""
+        other_post = Post.objects.create(author=self.reader, text='Другой')
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        Comment.objects.create(
+            post=other_post,
+            author=self.author,
+            text='Комментарий',
+        )
+        repeated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeated.status_code, 304)
@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.post = Post.objects.create(author=cls.author, text='test post')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_post_count(self):
+        """Счётчик постов меняется при создании и удалении поста."""
+        self.assertEqual(self.stats(self.author).post_count, 1)
+        post = Post.objects.create(author=self.author, text='second post')
+        self.assertEqual(self.stats(self.author).post_count, 2)
+        post.delete()
+        self.assertEqual(self.stats(self.author).post_count, 1)
+
+    def test_comment_count(self):
+        """Счётчик комментариев меняется при создании и удалении."""
+        comment = Comment.objects.create(
+            post=self.post,
+            author=self.follower,
+            text='comment',
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_follow_counts(self):
+        """Подписка меняет счётчики подписчиков и подписок."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(self.stats(self.author).follower_count, 1)
+        self.assertEqual(self.stats(self.follower).following_count, 1)
+        Follow.objects.filter(user=self.follower).delete()
+        self.assertEqual(self.stats(self.author).follower_count, 0)
+        self.assertEqual(self.stats(self.follower).following_count, 0)
+
+    def test_delete_user_with_posts(self):
+        """Удаление автора с постами и комментариями не ломает счётчики."""
+        leaving = User.objects.create_user(username='leaving')
+        post = Post.objects.create(author=leaving, text='leaving post')
+        Comment.objects.create(post=post, author=self.follower, text='a')
+        Comment.objects.create(post=self.post, author=leaving, text='b')
+        Follow.objects.create(user=leaving, author=self.author)
+        Follow.objects.create(user=self.follower, author=leaving)
+        leaving.delete()
+        connection.check_constraints()
+        self.assertFalse(AuthorStats.objects.filter(
+            user_id=leaving.pk
+        ).exists())
+        self.assertEqual(self.stats(self.author).follower_count, 0)
+        self.assertEqual(self.stats(self.follower).following_count, 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_reconcile_command(self):
+        """Команда reconcile_counters восстанавливает счётчики."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        Comment.objects.create(
+            post=self.post,
+            author=self.follower,
+            text='comment',
+        )
+        AuthorStats.objects.update(
+            post_count=0,
+            follower_count=0,
+            following_count=0
+        )
+        AuthorStats.objects.filter(user=self.follower).delete()
+        Post.objects.update(comment_count=0)
+        call_command('reconcile_counters', chunk_size=1, stdout=StringIO())
+        self.assertEqual(self.stats(self.author).post_count, 1)
+        self.assertEqual(self.stats(self.author).follower_count, 1)
+        self.assertEqual(self.stats(self.follower).following_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_pages_render_without_aggregate_queries(self):
+        """Профиль и страница поста не выполняют COUNT-запросов."""
+        client = Client()
+        client.force_login(self.follower)
+        urls = (
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                self.assertContains(response, self.post.text)
+                for query in queries.captured_queries:
+                    self.assertNotIn('COUNT(', query['sql'])
@@ -0,0 +1,114 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title='Кошки',
+            slug='cats',
+            description='Про кошек',
+        )
+        cls.old_post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Старый пост',
+        )
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=10)
+        )
+        cls.new_post = Post.objects.create(author=cls.user, text='Новый')
+        Comment.objects.create(
+            post=cls.old_post,
+            author=cls.user,
+            text='Комментарий',
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def export(self, *args, **options):
+        out = StringIO()
+        call_command(
+            'export_posts',
+            *args,
+            stdout=out,
+            stderr=StringIO(),
+            **options
+        )
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_export_records(self):
+        """Выгрузка содержит автора, группу и число комментариев."""
+        records = self.export(chunk_size=1)
+        self.assertEqual(
+            [record['id'] for record in records],
+            [self.old_post.pk, self.new_post.pk]
+        )
+        self.assertEqual(records[0]['author'], 'leo')
+        self.assertEqual(records[0]['group'], 'cats')
+        self.assertEqual(records[0]['comment_count'], 1)
+        self.assertIsNone(records[1]['group'])
+
+    def test_incremental_export(self):
+        """С --since выгружаются только новые посты."""
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        records = self.export(since=since)
+        self.assertEqual([record['id'] for record in records], [
+            self.new_post.pk
+        ])
+
+    def test_gzip_export_can_be_imported(self):
+        """Сжатая выгрузка читается обратно импортом."""
+        path = os.path.join(self.directory, 'posts.ndjson.gz')
+        self.export(path)
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        Post.objects.all().delete()
+        plain = os.path.join(self.directory, 'posts.jsonl')
+        with open(plain, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines))
+        call_command('import_yatube', plain, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_admin_action_streams_selection(self):
+        """Действие админки отдаёт выбранные посты потоком."""
+        admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='password'
+        )
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'export_ndjson',
+                '_selected_action': [self.new_post.pk],
+            }
+        )
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines],
+            [self.new_post.pk]
+        )
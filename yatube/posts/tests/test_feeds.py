@@ -0,0 +1,129 @@
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..feed_cache import bump_versions
+from ..models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedsTest(TestCase):
+    """RSS и Atom ленты постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.other = User.objects.create_user(username='ann')
+        cls.group = Group.objects.create(
+            title='Кошки',
+            slug='cats',
+            description='Про кошек',
+        )
+        cls.group_post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Пост в группе',
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other,
+            text='Пост без группы',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def rss_titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        root = ElementTree.fromstring(response.content)
+
+        return [item.findtext('title') for item in root.iter('item')]
+
+    def test_rss_feeds_use_page_querysets(self):
+        """Ленты содержат те же посты, что и их страницы."""
+        cases = {
+            reverse('posts:index_rss'): ['Пост без группы', 'Пост в группе'],
+            reverse('posts:group_rss', args=['cats']): ['Пост в группе'],
+            reverse('posts:profile_rss', args=['ann']): ['Пост без группы'],
+        }
+        for url, titles in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.rss_titles(url), titles)
+
+    def test_atom_feed(self):
+        """Atom-лента отдаётся со своим типом и ссылками на посты."""
+        response = self.client.get(
+            reverse('posts:group_atom', args=['cats'])
+        )
+        self.assertEqual(
+            response['Content-Type'],
+            'application/atom+xml; charset=utf-8'
+        )
+        root = ElementTree.fromstring(response.content)
+        link = root.find(f'{ATOM}entry/{ATOM}link').get('href')
+        self.assertTrue(link.endswith(
+            reverse('posts:post_detail', args=[self.group_post.pk])
+        ))
+
+    def test_unknown_object_returns_404(self):
+        """Лента несуществующей группы или автора отвечает 404."""
+        for url in (
+            reverse('posts:group_rss', args=['missing']),
+            reverse('posts:profile_atom', args=['missing']),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_cached_feed_skips_serialization(self):
+        """Повторный запрос ленты не выбирает посты заново."""
+        url = reverse('posts:index_rss')
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('Last-Modified', second)
+
+    def test_new_post_invalidates_feed(self):
+        """Новый пост сразу попадает в закэшированную ленту."""
+        url = reverse('posts:profile_rss', args=['leo'])
+        self.rss_titles(url)
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.assertEqual(self.rss_titles(url)[0], 'Свежий пост')
+
+    def test_other_scope_changes_keep_feed_cached(self):
+        """Пост другого автора не сбрасывает кэш ленты профиля."""
+        url = reverse('posts:profile_rss', args=['ann'])
+        first = self.client.get(url)
+        Post.objects.create(author=self.author, text='Чужой пост')
+        bump_versions('feed')
+        # Автор ленты и дата её последнего поста, без выборки постов.
+        with self.assertNumQueries(2):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+
+    def test_pages_link_to_feeds(self):
+        """Страницы объявляют свои ленты в заголовке."""
+        cases = {
+            reverse('posts:index'): reverse('posts:index_rss'),
+            reverse('posts:group_list', args=['cats']): reverse(
+                'posts:group_rss',
+                args=['cats']
+            ),
+            reverse('posts:profile', args=['leo']): reverse(
+                'posts:profile_atom',
+                args=['leo']
+            ),
+        }
+        for page, feed in cases.items():
+            with self.subTest(page=page):
+                self.assertContains(self.client.get(page), f'href="{feed}"')
@@ -1,12 +1,16 @@
 import shutil
 import tempfile
+from io import BytesIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
+from ..constants import IMAGE_MAX_DIMENSION
 from ..models import Post, Group, Comment
 from ..forms import PostForm
 
@@ -159,3 +163,75 @@ class CommentFormTest(TestCase):
             comment_post_page
         )
         self.assertEqual(Comment.objects.count(), comments_count + 1)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageIngestionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @staticmethod
+    def get_image_file(name, size, image_format='PNG', exif=None):
+        file_obj = BytesIO()
+        image = Image.new('RGB', size=size, color=(255, 0, 0))
+        if exif is None:
+            image.save(file_obj, image_format)
+        else:
+            image.save(file_obj, image_format, exif=exif)
+        return SimpleUploadedFile(name, file_obj.getvalue())
+
+    def test_image_is_capped_and_converted(self):
+        """Картинка уменьшается, поворачивается по EXIF и хранится в JPEG."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        upload = self.get_image_file(
+            'photo.jpg',
+            (IMAGE_MAX_DIMENSION * 2, IMAGE_MAX_DIMENSION),
+            'JPEG',
+            exif=exif.tobytes()
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'test post', 'image': upload},
+        )
+        post = Post.objects.get(text='test post')
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(
+                stored.size,
+                (IMAGE_MAX_DIMENSION // 2, IMAGE_MAX_DIMENSION)
+            )
+            self.assertEqual(stored.format, 'JPEG')
+
+    def test_too_many_pixels_rejected(self):
+        """Слишком большое разрешение отклоняется до декодирования."""
+        upload = self.get_image_file('huge.png', (400, 300))
+        with mock.patch('posts.images.constants.IMAGE_MAX_PIXELS', 1000):
+            form = PostForm(
+                data={'text': 'test post'},
+                files={'image': upload}
+            )
+            self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    def test_too_many_bytes_rejected(self):
+        """Слишком большой файл отклоняется."""
+        upload = self.get_image_file('heavy.png', (40, 30))
+        with mock.patch('posts.images.constants.IMAGE_MAX_BYTES', 10):
+            form = PostForm(
+                data={'text': 'test post'},
+                files={'image': upload}
+            )
+            self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
@@ -0,0 +1,166 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..importer import Importer, read_jsonl
+from ..models import (
+    Comment,
+    Follow,
+    Group,
+    ImportedRecord,
+    Post,
+    TimelineEntry,
+)
+
+User = get_user_model()
+
+RECORDS = (
+    {'type': 'post', 'id': 101, 'author': 'leo', 'group': 'cats',
+     'group_title': 'Кошки', 'text': 'Первый пост',
+     'pub_date': '2020-01-02T03:04:05'},
+    {'type': 'post', 'id': 102, 'author': 'leo', 'text': 'Второй пост'},
+    {'type': 'comment', 'post': 101, 'author': 'mia', 'text': 'Отлично'},
+    {'type': 'follow', 'user': 'mia', 'author': 'leo'},
+    {'type': 'follow', 'user': 'leo', 'author': 'leo'},
+    {'type': 'unknown'},
+)
+
+
+class ImportYatubeTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def write_jsonl(self, records=RECORDS):
+        return self.write(
+            'data.jsonl',
+            '\n'.join(json.dumps(record) for record in records) + '\nnot json'
+        )
+
+    def run_import(self, *args, **options):
+        out = StringIO()
+        call_command('import_yatube', *args, stdout=out, **options)
+        return out.getvalue()
+
+    def test_jsonl_import(self):
+        """Импорт создаёт записи, авторов, группы и пересчитывает ленты."""
+        out = self.run_import(self.write_jsonl(), chunk_size=2, batch_size=1)
+        self.assertIn('записей/с', out)
+        self.assertIn('пропущено: 3', out)
+        leo = User.objects.get(username='leo')
+        mia = User.objects.get(username='mia')
+        post = Post.objects.get(text='Первый пост')
+        self.assertEqual(post.author, leo)
+        self.assertEqual(post.group, Group.objects.get(slug='cats'))
+        self.assertEqual(
+            post.pub_date,
+            timezone.make_aware(datetime(2020, 1, 2, 3, 4, 5))
+        )
+        self.assertEqual(post.comment_count, 1)
+        self.assertTrue(Comment.objects.filter(post=post, author=mia).exists())
+        self.assertTrue(Follow.objects.filter(user=mia, author=leo).exists())
+        self.assertEqual(TimelineEntry.objects.filter(user=mia).count(), 2)
+        self.assertEqual(leo.stats.follower_count, 1)
+
+    def test_repeated_import_is_idempotent(self):
+        """Повторный импорт не дублирует посты и подписки."""
+        path = self.write_jsonl()
+        self.run_import(path)
+        self.run_import(path)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_counts_only_inserted_rows(self):
+        """Строки, пропущенные из-за конфликта ключей, не считаются."""
+        lines = [json.dumps(record) for record in RECORDS]
+        for expected in (1, 0):
+            importer = Importer()
+            list(importer.run(read_jsonl(lines)))
+            with self.subTest(run=expected):
+                self.assertEqual(importer.counts['post'], 2 * expected)
+                self.assertEqual(importer.counts['follow'], expected)
+        self.assertEqual(importer.counts['comment'], 1)
+
+    def test_auto_now_add_untouched(self):
+        """Импорт не отключает auto_now_add для остального процесса."""
+        field = Post._meta.get_field('pub_date')
+        importer = Importer()
+        for _ in importer.run(read_jsonl([json.dumps(RECORDS[0])])):
+            self.assertTrue(field.auto_now_add)
+        self.assertEqual(
+            Post.objects.get(text='Первый пост').pub_date,
+            timezone.make_aware(datetime(2020, 1, 2, 3, 4, 5))
+        )
+
+    def test_source_ids_do_not_collide_with_local_rows(self):
+        """id источника не затирают и не подменяют локальные посты."""
+        local_author = User.objects.create_user(username='local')
+        local = Post.objects.create(author=local_author, text='Локальный')
+        records = (
+            {'type': 'post', 'id': local.pk, 'author': 'leo',
+             'text': 'Импортированный'},
+            {'type': 'comment', 'id': 7, 'post': local.pk, 'author': 'mia',
+             'text': 'К импортированному'},
+            {'type': 'comment', 'id': 8, 'post': 999, 'author': 'mia',
+             'text': 'К неизвестному'},
+        )
+        self.run_import(self.write_jsonl(records))
+        imported = Post.objects.get(text='Импортированный')
+        self.assertNotEqual(imported.pk, local.pk)
+        self.assertEqual(
+            ImportedRecord.objects.get(
+                kind='post',
+                source_id=str(local.pk)
+            ).local_id,
+            imported.pk
+        )
+        self.assertEqual(
+            list(imported.comments.values_list('text', flat=True)),
+            ['К импортированному']
+        )
+        self.assertFalse(local.comments.exists())
+
+        importer = Importer()
+        lines = [json.dumps(record) for record in records]
+        list(importer.run(read_jsonl(lines)))
+        self.assertEqual(importer.counts['post'], 0)
+        self.assertEqual(importer.counts['comment'], 0)
+        self.assertEqual(importer.counts['skipped'], 3)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_resume_from_checkpoint(self):
+        """С --resume импорт продолжается после сохранённой строки."""
+        checkpoint = self.write('checkpoint.json', json.dumps({'line': 1}))
+        self.run_import(
+            self.write_jsonl(),
+            checkpoint=checkpoint,
+            resume=True,
+            chunk_size=2
+        )
+        self.assertFalse(Post.objects.filter(text='Первый пост').exists())
+        self.assertTrue(Post.objects.filter(text='Второй пост').exists())
+        with open(checkpoint) as file:
+            self.assertEqual(json.load(file)['line'], len(RECORDS) + 1)
+
+    def test_csv_import(self):
+        """CSV-файл импортируется записями одного типа."""
+        path = self.write('follows.csv', 'user,author\nmia,leo\nbob,leo\n')
+        self.run_import(path, kind='follow')
+        self.assertEqual(
+            Follow.objects.filter(author__username='leo').count(),
+            2
+        )
@@ -0,0 +1,74 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Follow, Group, Post
+from ..pagination import CursorPaginator
+from ..timeline import TimelinePaginator
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='test title',
+            slug='test-slug',
+            description='test description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='test post',
+            group=cls.group,
+        )
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return ' | '.join(str(row[-1]) for row in cursor.fetchall())
+
+    def window(self, paginator):
+        return paginator.window_queryset(None)[:paginator.per_page + 1]
+
+    def timeline_window(self):
+        paginator = TimelinePaginator(Post.objects.all(), 10, user=self.user)
+        pushed = paginator.get_sources()[0]
+        return paginator.window_queryset(None, pushed)[:paginator.per_page + 1]
+
+    def test_feeds_use_composite_indexes(self):
+        """Ленты читаются по индексам без сортировки во временном дереве."""
+        feeds = {
+            'post_pub_date_idx': self.window(CursorPaginator(
+                Post.objects.select_related('author', 'group'), 10
+            )),
+            'post_group_pub_date_idx': self.window(CursorPaginator(
+                self.group.posts.select_related('author'), 10
+            )),
+            'post_author_pub_date_idx': self.window(CursorPaginator(
+                self.author.posts.all(), 10
+            )),
+            'timeline_user_pub_date_idx': self.timeline_window(),
+            'comment_post_created_idx': self.post.comments.all(),
+        }
+        for index_name, queryset in feeds.items():
+            with self.subTest(index_name=index_name):
+                plan = self.query_plan(queryset)
+                self.assertIn(index_name, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_follow_lookup_uses_unique_index(self):
+        """Поиск подписки (user, author) идёт по уникальному индексу."""
+        plan = self.query_plan(Follow.objects.filter(
+            user=self.user,
+            author=self.author
+        ))
+        self.assertIn('INDEX', plan)
+        self.assertNotIn('SCAN', plan)
@@ -0,0 +1,93 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..loadtest import DEFAULT_WEIGHTS, percentile, route_name, run_load
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class LoadTestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='ann')
+        cls.group = Group.objects.create(
+            title='Кошки',
+            slug='cats',
+            description='Про кошек',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(5):
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group,
+                text=f'Пост {number}',
+            )
+
+    def test_percentile(self):
+        """Перцентиль считается по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_route_name(self):
+        """Запросы группируются по имени маршрута."""
+        self.assertEqual(route_name('/group/cats/?cursor=abc'),
+                         'posts:group_list')
+
+    def test_report_covers_scenarios(self):
+        """Отчёт содержит задержки и число запросов по маршрутам."""
+        report = run_load(DEFAULT_WEIGHTS, 60, warmup=2)
+        self.assertEqual(sum(report['scenarios'].values()), 60)
+        self.assertEqual(report['errors'], 0)
+        self.assertIn('posts:index', report['routes'])
+        for route, stats in report['routes'].items():
+            with self.subTest(route=route):
+                self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+                self.assertEqual(
+                    sum(stats['histogram'].values()),
+                    stats['requests']
+                )
+                self.assertIsNotNone(stats['queries_mean'])
+
+    def test_same_seed_same_scenarios(self):
+        """Одно зерно даёт ту же последовательность сценариев."""
+        weights = {'browse_index': 1, 'read_post': 1, 'browse_group': 1}
+        first = run_load(weights, 20, seed=3)['scenarios']
+        second = run_load(weights, 20, seed=3)['scenarios']
+        self.assertEqual(first, second)
+
+    def test_command_writes_json(self):
+        """Команда выводит отчёт в JSON с учётом весов."""
+        out = StringIO()
+        call_command(
+            'loadtest',
+            iterations=10,
+            workers=1,
+            warmup=0,
+            weight=[
+                (name, 0) for name in DEFAULT_WEIGHTS
+                if name != 'browse_index'
+            ],
+            label='base',
+            stdout=out,
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['label'], 'base')
+        self.assertEqual(report['scenarios'], {'browse_index': 10})
+        self.assertEqual(report['routes']['posts:index']['requests'], 10)
+
+
+class LoadTestEmptyDatabaseTest(TestCase):
+    def test_requires_data(self):
+        """Без постов и пользователей команда просит заполнить базу."""
+        with self.assertRaises(CommandError):
+            call_command('loadtest', iterations=1, stdout=StringIO())
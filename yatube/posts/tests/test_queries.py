@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..feed_cache import bump_versions
+from ..models import Comment, Follow, Group, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+FEED_SIZES = (1, 10, 100)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryCountTest(TestCase):
+    """Количество запросов страниц не зависит от их содержимого."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test title',
+            slug='test-slug',
+            description='test description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='commented post',
+            group=cls.group,
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.seeded = 0
+
+    def seed(self, size):
+        """Догоняет ленту до size постов с картинками и комментариями."""
+        for number in range(self.seeded, size):
+            image = f'posts/{number}.gif'
+            with open(os.path.join(TEMP_MEDIA_ROOT, image), 'wb') as file:
+                file.write(SMALL_GIF)
+            Post.objects.create(
+                author=self.author,
+                text=f'post {number}',
+                group=self.group,
+                image=image,
+            )
+            Comment.objects.create(
+                post=self.post,
+                author=self.reader if number % 2 else self.author,
+                text=f'comment {number}',
+            )
+        self.seeded = size
+
+    def count_queries(self, url):
+        # Первый запрос прогревает кэш миниатюр и сессию,
+        # кэш фрагментов ленты сбрасывается, чтобы страница
+        # действительно отрисовалась.
+        self.client.get(url)
+        bump_versions('feed')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        return len(queries)
+
+    def test_views_run_constant_number_of_queries(self):
+        """Каждая страница делает одинаковое число запросов на 1-100 постах."""
+        urls = {
+            'index': reverse('posts:index'),
+            'group_list': reverse('posts:group_list', args=(self.group.slug,)),
+            'profile': reverse('posts:profile', args=(self.author.username,)),
+            'post_detail': reverse('posts:post_detail', args=(self.post.pk,)),
+            'follow_index': reverse('posts:follow_index'),
+        }
+        counts = {name: [] for name in urls}
+        for size in FEED_SIZES:
+            self.seed(size)
+            for name, url in urls.items():
+                counts[name].append(self.count_queries(url))
+        for name, sizes in counts.items():
+            with self.subTest(view=name):
+                self.assertEqual(
+                    len(set(sizes)), 1,
+                    f'{name}: {dict(zip(FEED_SIZES, sizes))}'
+                )
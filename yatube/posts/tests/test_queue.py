@@ -0,0 +1,86 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Task
+from ..queue import enqueue, run_task, task
+
+CALLS = []
+
+
+@task
+def remember(value):
+    CALLS.append(value)
+
+
+@task
+def explode():
+    raise RuntimeError('boom')
+
+
+@override_settings(TASK_QUEUE_WORKERS=0)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_task_runs_inline_without_workers(self):
+        """Без потоков задача выполняется сразу."""
+        queued = enqueue(remember, 'value')
+        queued.refresh_from_db()
+        self.assertEqual(CALLS, ['value'])
+        self.assertEqual(queued.status, Task.DONE)
+        self.assertEqual(queued.attempts, 1)
+
+    def test_idempotency_key_deduplicates_active_tasks(self):
+        """Пока задача ожидает, повторная постановка её не дублирует."""
+        first = enqueue(remember, 1, key='same', delay=60)
+        second = enqueue(remember, 2, key='same', delay=60)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+        Task.objects.filter(pk=first.pk).update(status=Task.DONE)
+        enqueue(remember, 3, key='same')
+        self.assertEqual(CALLS, [3])
+
+    def test_failed_task_retried_with_backoff(self):
+        """Упавшая задача откладывается, а после лимита - ошибка."""
+        with self.assertLogs('posts.queue', 'ERROR'):
+            queued = enqueue(explode)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.PENDING)
+        self.assertGreater(queued.run_after, timezone.now())
+        self.assertIn('boom', queued.last_error)
+        Task.objects.filter(pk=queued.pk).update(
+            run_after=timezone.now(),
+            attempts=queued.max_attempts - 1
+        )
+        with self.assertLogs('posts.queue', 'ERROR'):
+            self.assertFalse(run_task(queued.pk))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+
+    def test_unknown_function_rejected(self):
+        """В очередь ставятся только зарегистрированные задачи."""
+        with self.assertRaises(ValueError):
+            enqueue(len, 'text')
+
+    def test_worker_runs_due_and_abandoned_tasks(self):
+        """Команда выполняет созревшие и брошенные задачи."""
+        delayed = enqueue(remember, 'delayed', delay=60)
+        Task.objects.filter(pk=delayed.pk).update(
+            run_after=timezone.now() - timedelta(seconds=1)
+        )
+        Task.objects.create(
+            name=f'{remember.__module__}.remember',
+            payload='["abandoned"]',
+            status=Task.RUNNING,
+            run_after=timezone.now(),
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        enqueue(remember, 'future', delay=60)
+        out = StringIO()
+        call_command('run_tasks', once=True, workers=1, stdout=out)
+        self.assertCountEqual(CALLS, ['delayed', 'abandoned'])
+        self.assertIn('Выполнено задач: 2', out.getvalue())
@@ -0,0 +1,102 @@
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from ..constants import POSTS_PER_PAGE
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.text_post = Post.objects.create(
+            author=cls.user,
+            text='Сегодня видели северное сияние над озером',
+        )
+        cls.comment_post = Post.objects.create(
+            author=cls.user,
+            text='Фотографии из поездки',
+        )
+        Comment.objects.create(
+            post=cls.comment_post,
+            author=cls.user,
+            text='Какое сияние!',
+        )
+        Post.objects.create(author=cls.user, text='Совсем другой пост')
+
+    def search(self, query, **params):
+        return self.client.get(
+            reverse('posts:search'),
+            {'q': query, **params}
+        )
+
+    def test_ranked_results_from_posts_and_comments(self):
+        """Находятся посты по тексту и комментариям, текст важнее."""
+        response = self.search('сияние')
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.text_post, self.comment_post]
+        )
+
+    def test_snippet_highlighted_and_escaped(self):
+        """Фрагмент подсвечивает слово и экранирует разметку."""
+        Post.objects.create(
+            author=self.user,
+            text='<script>alert(1)</script> комета',
+        )
+        response = self.search('комета')
+        self.assertContains(response, '<mark>комета</mark>')
+        self.assertNotContains(response, '<script>alert')
+
+    def test_index_follows_updates_and_deletes(self):
+        """Индекс следует за изменением и удалением текста."""
+        post = Post.objects.create(author=self.user, text='старое слово')
+        Post.objects.filter(pk=post.pk).update(text='новое слово')
+        self.assertEqual(list(self.search('старое').context['page_obj']), [])
+        self.assertEqual(
+            list(self.search('новое').context['page_obj']),
+            [post]
+        )
+        post.delete()
+        self.assertEqual(list(self.search('новое').context['page_obj']), [])
+
+    def test_cursor_pagination(self):
+        """Результаты листаются курсором вперёд и назад."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'метеор номер {number}')
+            for number in range(POSTS_PER_PAGE + 2)
+        )
+        first_page = self.search('метеор').context['page_obj']
+        self.assertEqual(len(first_page), POSTS_PER_PAGE)
+        second_page = self.search(
+            'метеор',
+            cursor=first_page.cursor.next
+        ).context['page_obj']
+        self.assertEqual(len(second_page), 2)
+        self.assertFalse(set(first_page) & set(second_page))
+        previous_page = self.search(
+            'метеор',
+            cursor=second_page.cursor.previous
+        ).context['page_obj']
+        self.assertEqual(list(previous_page), list(first_page))
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Операторы FTS5 во вводе не ломают поиск."""
+        for query in ('"', 'NEAR(', 'сияние OR', '*', '', '\x00', 'а\x00б'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query).status_code, 200)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт по тому же индексу."""
+        queryset, use_distinct = site._registry[Post].get_search_results(
+            None,
+            Post.objects.all(),
+            'северное'
+        )
+        self.assertEqual(list(queryset), [self.text_post])
+        self.assertFalse(use_distinct)
@@ -0,0 +1,122 @@
+import random
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+
+from ..models import (
+    AuthorStats,
+    Comment,
+    Follow,
+    Group,
+    Post,
+    TimelineEntry,
+)
+from ..seeding import Seeder, power_law_index
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedPerfTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, **options):
+        options = {
+            'users': 30,
+            'groups': 3,
+            'posts': 200,
+            'comments': 300,
+            'follows_per_user': 5,
+            'chunk_size': 70,
+            **options,
+        }
+        call_command('seed_perf', stdout=StringIO(), **options)
+
+    def test_creates_requested_rows(self):
+        """Команда создаёт заданное число записей и пересчитывает счётчики."""
+        self.seed(images=2, image_ratio=0.5)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')
+        ).exists())
+        self.assertEqual(
+            AuthorStats.objects.aggregate(total=Sum('post_count'))['total'],
+            200
+        )
+        with_images = Post.objects.exclude(image='')
+        self.assertTrue(with_images.exists())
+        self.assertLessEqual(
+            with_images.values('image').distinct().count(),
+            2
+        )
+
+    def test_same_seed_same_data(self):
+        """Одно и то же зерно даёт одинаковые тексты и даты."""
+        self.seed(prefix='first')
+        first = list(Post.objects.order_by('pk').values_list(
+            'text',
+            'pub_date'
+        ))
+        self.seed(prefix='second')
+        second = list(Post.objects.order_by('pk').values_list(
+            'text',
+            'pub_date'
+        ))[len(first):]
+        self.assertEqual(first, second)
+
+    def test_prefix_collision(self):
+        """Повторный запуск с тем же префиксом отклоняется."""
+        self.seed(posts=0, comments=0, skip_post_process=True)
+        with self.assertRaises(CommandError):
+            self.seed(posts=0, comments=0, skip_post_process=True)
+
+    def test_independent_rankings(self):
+        """Популярность авторов и подписок задаётся разными перестановками."""
+        seeder = Seeder(users=50, groups=0, posts=0, comments=0,
+                        follows_per_user=0)
+        authors = seeder.ranking('author_ranks')
+        followees = seeder.ranking('followee_ranks')
+        self.assertEqual(sorted(authors), list(range(50)))
+        self.assertEqual(sorted(followees), list(range(50)))
+        self.assertNotEqual(authors, followees)
+
+    def test_post_process_fills_timelines(self):
+        """После заполнения ленты содержат посты всех подписок."""
+        out = StringIO()
+        call_command(
+            'seed_perf',
+            users=30,
+            groups=0,
+            posts=100,
+            comments=0,
+            follows_per_user=5,
+            stdout=out
+        )
+        self.assertIn('Ленты:', out.getvalue())
+        expected = Follow.objects.filter(
+            author__posts__isnull=False
+        ).count()
+        self.assertEqual(TimelineEntry.objects.count(), expected)
+
+    def test_power_law_index(self):
+        """Малые индексы выпадают чаще больших, все в пределах."""
+        rng = random.Random(0)
+        samples = [power_law_index(rng, 100) for _ in range(10000)]
+        self.assertEqual(min(samples), 0)
+        self.assertLess(max(samples), 100)
+        self.assertGreater(samples.count(0), samples.count(50) * 10)
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+
+from .. import constants
+from ..images import release_image
+from ..models import ImageBlob, Post
+from ..storage import post_image_storage
+from ..thumbnail_cache import get_disk_cache, image_modified, thumbnail_key
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+User = get_user_model()
+
+
+def uploaded_gif(name, content=SMALL_GIF):
+    return SimpleUploadedFile(
+        name=name,
+        content=content,
+        content_type='image/gif'
+    )
+
+
+def cached_thumbnails():
+    """Имена всех файлов дискового кэша миниатюр."""
+    return sorted(
+        name
+        for _, _, names in os.walk(get_disk_cache().directory)
+        for name in names
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    TASK_QUEUE_WORKERS=0,
+    THUMBNAIL_DISK_CACHE_DIR=os.path.join(TEMP_MEDIA_ROOT, 'cache')
+)
+class ContentAddressedStorageTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test_user')
+
+    def tearDown(self):
+        cache.clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.user,
+            text='test post',
+            image=uploaded_gif(name),
+        )
+
+    def test_duplicates_share_file_and_thumbnail(self):
+        """Одинаковые загрузки хранятся одним файлом с общей миниатюрой."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^posts/\w{2}/\w{2}/\w{64}\.gif$')
+        directory = os.path.dirname(post_image_storage.path(first.image.name))
+        self.assertEqual(os.listdir(directory), [
+            os.path.basename(first.image.name)
+        ])
+        self.assertEqual(cached_thumbnails(), sorted(
+            thumbnail_key(
+                first.image.name,
+                image_modified(first.image.name),
+                'card',
+                image_format
+            )
+            for image_format in constants.THUMBNAIL_FORMATS
+        ))
+
+    def test_file_deleted_with_last_reference(self):
+        """Файл и миниатюры удаляются вместе с последним постом."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        name = first.image.name
+        self.assertTrue(cached_thumbnails())
+        first.delete()
+        self.assertTrue(post_image_storage.exists(name))
+        second.delete()
+        self.assertFalse(post_image_storage.exists(name))
+        self.assertEqual(cached_thumbnails(), [])
+
+    def test_replaced_file_released(self):
+        """Заменённая картинка удаляется, если на неё нет ссылок."""
+        post = self.create_post('first.gif')
+        old_name = post.image.name
+        post.image = uploaded_gif('other.gif', SMALL_GIF + b'\x00')
+        post.save()
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertFalse(post_image_storage.exists(old_name))
+        self.assertTrue(post_image_storage.exists(post.image.name))
+
+    def test_upload_locks_file(self):
+        """Загрузка берёт блокировку файла, освобождение её удаляет."""
+        post = self.create_post('first.gif')
+        name = post.image.name
+        self.assertTrue(ImageBlob.objects.filter(name=name).exists())
+        post.delete()
+        self.assertFalse(ImageBlob.objects.filter(name=name).exists())
+
+    def test_release_keeps_file_of_new_reference(self):
+        """Файл, на который сослался новый пост, не удаляется."""
+        first = self.create_post('first.gif')
+        name = first.image.name
+        Post.objects.filter(pk=first.pk).delete()
+        second = self.create_post('second.gif')
+        self.assertEqual(second.image.name, name)
+        release_image(name)
+        self.assertTrue(post_image_storage.exists(name))
+        second.delete()
+        self.assertFalse(post_image_storage.exists(name))
+        third = self.create_post('third.gif')
+        self.assertTrue(post_image_storage.exists(third.image.name))
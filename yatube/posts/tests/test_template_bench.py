@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..template_bench import PAGES, find_regressions, run_benchmarks
+
+
+class TemplateBenchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = run_benchmarks(cards=(1, 3), rounds=1,
+                                    min_round_seconds=0)
+
+    def test_report_covers_pages(self):
+        """Отчёт содержит все страницы и количества карточек."""
+        self.assertEqual(set(self.report['pages']), set(PAGES))
+        for page, result in self.report['pages'].items():
+            with self.subTest(page=page):
+                self.assertEqual(set(result['cards']), {'1', '3'})
+                self.assertIsNotNone(result['per_card_us'])
+                for stats in result['cards'].values():
+                    self.assertGreater(stats['render_us'], 0)
+                    self.assertGreater(stats['peak_alloc_bytes'], 0)
+
+    def test_render_without_queries(self):
+        """Отрисовка на неизменных контекстах не ходит в базу."""
+        for page, result in self.report['pages'].items():
+            for count, stats in result['cards'].items():
+                with self.subTest(page=page, cards=count):
+                    self.assertEqual(stats['queries'], 0)
+
+    def test_find_regressions(self):
+        """Регрессией считается замедление больше порога."""
+        baseline = {'pages': {'index': {
+            'per_card_us': 100,
+            'cards': {'1': {'render_us': 1000}},
+        }}}
+        report = {'pages': {
+            'index': {
+                'per_card_us': 105,
+                'cards': {
+                    '1': {'render_us': 1200},
+                    '10': {'render_us': 5000},
+                },
+            },
+            'follow': {'per_card_us': 500, 'cards': {}},
+        }}
+        self.assertEqual(
+            find_regressions(report, baseline, 0.1),
+            [('index:cards=1:render_us', 1000, 1200)]
+        )
+        self.assertEqual(find_regressions(report, baseline, 0.5), [])
+
+    def test_command_compares_with_baseline(self):
+        """Команда сохраняет отчёт и падает при регрессии."""
+        options = {
+            'pages': ['index'],
+            'cards': [1, 2],
+            'rounds': 1,
+            'min_round_seconds': 0,
+            'stdout': StringIO(),
+            'stderr': StringIO(),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+            call_command('bench_templates', output=output, **options)
+            with open(output) as file:
+                report = json.load(file)
+            self.assertIn('index', report['pages'])
+
+            for stats in report['pages']['index']['cards'].values():
+                stats['render_us'] /= 100
+            report['pages']['index']['per_card_us'] /= 100
+            baseline = os.path.join(directory, 'baseline.json')
+            with open(baseline, 'w') as file:
+                json.dump(report, file)
+            with self.assertRaises(CommandError):
+                call_command('bench_templates', compare=baseline, **options)
@@ -0,0 +1,307 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import constants
+from ..models import Post, Task
+from ..storage import post_image_storage
+from ..tasks import schedule_thumbnails
+from ..thumbnail_cache import (
+    DiskLRUCache,
+    get_disk_cache,
+    image_modified,
+    thumbnail_key,
+    thumbnail_version,
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+User = get_user_model()
+
+
+def uploaded_gif(name='small.gif', suffix=b''):
+    return SimpleUploadedFile(
+        name=name,
+        content=SMALL_GIF + suffix,
+        content_type='image/gif'
+    )
+
+
+def cached_thumbnail(name, image_format):
+    """Путь к миниатюре card в дисковом кэше или None."""
+    key = thumbnail_key(name, image_modified(name), 'card', image_format)
+
+    return get_disk_cache().get(key)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    TASK_QUEUE_WORKERS=0,
+    THUMBNAIL_DISK_CACHE_DIR=os.path.join(TEMP_MEDIA_ROOT, 'cache')
+)
+class PageThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='test post',
+            image=uploaded_gif(),
+        )
+        cls.url = reverse(
+            'posts:thumbnail',
+            kwargs={
+                'size': 'card',
+                'version': thumbnail_version('card'),
+                'name': cls.post.image.name,
+            }
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_links_thumbnail_endpoint(self):
+        """Страница всегда ссылается на posts:thumbnail."""
+        page_url = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': self.post.id}
+        )
+        for built in (False, True):
+            with self.subTest(built=built):
+                if built:
+                    schedule_thumbnails(self.post.image.name)
+                response = self.client.get(page_url)
+                self.assertContains(response, self.url)
+                self.assertNotContains(response, self.post.image.url)
+
+    def test_render_does_not_enqueue(self):
+        """Отрисовка страницы без миниатюры ничего не пишет в базу."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        tasks_count = Task.objects.count()
+        with mock.patch('django.db.transaction.on_commit') as on_commit:
+            self.client.get(url)
+        on_commit.assert_not_called()
+        self.assertEqual(Task.objects.count(), tasks_count)
+
+    def test_built_thumbnail_served_without_rendering(self):
+        """После build_thumbnails адрес отдаёт миниатюру из кэша."""
+        schedule_thumbnails(self.post.image.name)
+        for image_format in constants.THUMBNAIL_FORMATS:
+            with self.subTest(image_format=image_format):
+                self.assertIsNotNone(
+                    cached_thumbnail(self.post.image.name, image_format)
+                )
+        with mock.patch(
+            'posts.thumbnail_cache.render_thumbnail'
+        ) as render_thumbnail:
+            for accept in ('image/webp,*/*', '*/*'):
+                response = self.client.get(self.url, HTTP_ACCEPT=accept)
+                self.assertEqual(response.status_code, 200)
+        render_thumbnail.assert_not_called()
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    TASK_QUEUE_WORKERS=0,
+    THUMBNAIL_DISK_CACHE_DIR=os.path.join(TEMP_MEDIA_ROOT, 'cache')
+)
+class ThumbnailOnSaveTest(TransactionTestCase):
+    def tearDown(self):
+        cache.clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_thumbnails_built_after_post_save(self):
+        """Миниатюры попадают в дисковый кэш сразу после сохранения."""
+        user = User.objects.create_user(username='test_user')
+        post = Post.objects.create(
+            author=user,
+            text='test post',
+            image=uploaded_gif('saved.gif'),
+        )
+        self.assertIsNotNone(cached_thumbnail(post.image.name, 'JPEG'))
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    TASK_QUEUE_WORKERS=0,
+    THUMBNAIL_DISK_CACHE_DIR=os.path.join(TEMP_MEDIA_ROOT, 'cache')
+)
+class ThumbnailEndpointTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        file_obj = BytesIO()
+        Image.new('RGB', (1200, 800), (0, 128, 255)).save(file_obj, 'PNG')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='test post',
+            image=SimpleUploadedFile('photo.png', file_obj.getvalue()),
+        )
+        cls.url = reverse(
+            'posts:thumbnail',
+            kwargs={
+                'size': 'card',
+                'version': thumbnail_version('card'),
+                'name': cls.post.image.name,
+            }
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_thumbnail_generated_with_cache_headers(self):
+        """Миниатюра создаётся по запросу и кэшируется надолго."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        content = b''.join(response.streaming_content)
+        with Image.open(BytesIO(content)) as image:
+            self.assertEqual(image.size, (960, 339))
+
+    def test_webp_negotiated_by_accept(self):
+        """Браузеру с поддержкой WebP отдаётся WebP."""
+        response = self.client.get(self.url, HTTP_ACCEPT='image/webp,*/*')
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertEqual(response['Vary'], 'Accept')
+
+    def test_not_modified_by_etag(self):
+        """Совпавший If-None-Match даёт 304 без тела."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        """Поддерживаются частичные и неудовлетворимые диапазоны."""
+        full = b''.join(self.client.get(self.url).streaming_content)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, full[:10])
+        self.assertEqual(
+            response['Content-Range'],
+            f'bytes 0-9/{len(full)}'
+        )
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.content, full[-5:])
+        response = self.client.get(
+            self.url,
+            HTTP_RANGE=f'bytes={len(full)}-'
+        )
+        self.assertEqual(response.status_code, 416)
+
+    def test_unknown_image_or_size(self):
+        """Неизвестные размер и картинка дают 404."""
+        urls = (
+            reverse(
+                'posts:thumbnail',
+                args=['huge', thumbnail_version('card'), self.post.image.name]
+            ),
+            reverse(
+                'posts:thumbnail',
+                args=['card', thumbnail_version('card'), 'posts/missing.jpg']
+            ),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_stale_version_redirects(self):
+        """Адрес с устаревшей версией размера ведёт на текущий."""
+        response = self.client.get(reverse(
+            'posts:thumbnail',
+            args=['card', 'outdated', self.post.image.name]
+        ))
+        self.assertRedirects(
+            response,
+            self.url,
+            fetch_redirect_response=False
+        )
+
+    def test_legacy_name_is_revalidated(self):
+        """Миниатюра картинки со старым именем не кэшируется навсегда."""
+        legacy_name = 'posts/photo.png'
+        shutil.copy(
+            post_image_storage.path(self.post.image.name),
+            post_image_storage.path(legacy_name)
+        )
+        Post.objects.create(author=self.user, text='old', image=legacy_name)
+        response = self.client.get(reverse(
+            'posts:thumbnail',
+            args=['card', thumbnail_version('card'), legacy_name]
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+
+class DiskLRUCacheTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_least_recently_read_evicted(self):
+        """При переполнении удаляется дольше всех не читанный файл."""
+        disk_cache = DiskLRUCache(self.directory, max_bytes=25)
+        disk_cache.set('aa1', b'x' * 10)
+        disk_cache.set('bb2', b'x' * 10)
+        os.utime(disk_cache.path('aa1'), (1, 1))
+        os.utime(disk_cache.path('bb2'), (2, 2))
+        disk_cache.get('aa1')
+        disk_cache.set('cc3', b'x' * 10)
+        self.assertIsNotNone(disk_cache.get('aa1'))
+        self.assertIsNone(disk_cache.get('bb2'))
+        self.assertIsNotNone(disk_cache.get('cc3'))
+
+    def test_directory_scanned_only_over_limit(self):
+        """Каталог обходится только после превышения лимита."""
+        disk_cache = DiskLRUCache(
+            self.directory,
+            max_bytes=30,
+            low_water=0.5
+        )
+        with mock.patch.object(
+            DiskLRUCache,
+            '_entries',
+            autospec=True,
+            side_effect=DiskLRUCache._entries
+        ) as entries:
+            for key in ('aa1', 'bb2', 'cc3'):
+                disk_cache.set(key, b'x' * 10)
+            self.assertEqual(entries.call_count, 1)
+            disk_cache.set('dd4', b'x' * 10)
+            self.assertEqual(entries.call_count, 2)
+        remaining = [
+            key for key in ('aa1', 'bb2', 'cc3', 'dd4')
+            if os.path.exists(disk_cache.path(key))
+        ]
+        self.assertEqual(len(remaining), 1)
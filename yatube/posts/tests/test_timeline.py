@@ -0,0 +1,163 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..constants import POSTS_PER_PAGE
+from ..models import Follow, Post, TimelineEntry
+from ..timeline import backfill_all
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='old post',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_follow_backfills_timeline(self):
+        """Подписка добавляет в ленту уже опубликованные посты автора."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower,
+            post=self.old_post
+        ).exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленту подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='new post')
+        entry = TimelineEntry.objects.get(user=self.follower, post=new_post)
+        self.assertEqual(entry.pub_date, new_post.pub_date)
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [new_post, self.old_post]
+        )
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка очищает ленту от постов автора."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.follower_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        ))
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.follower).exists()
+        )
+
+    def test_backfill_command(self):
+        """Команда backfill_timeline восстанавливает ленты подписок."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('backfill_timeline', stdout=StringIO())
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(),
+            Post.objects.filter(author=self.author).count()
+        )
+
+
+@override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=1)
+class HybridTimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.star = User.objects.create_user(username='star')
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.fan = User.objects.create_user(username='fan')
+
+    def setUp(self):
+        cache.clear()
+        Follow.objects.create(user=self.follower, author=self.star)
+        Follow.objects.create(user=self.fan, author=self.star)
+        Follow.objects.create(user=self.follower, author=self.author)
+        cache.clear()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_popular_author_posts_are_not_fanned_out(self):
+        """Посты популярного автора не раскладываются по лентам."""
+        post = Post.objects.create(author=self.star, text='star post')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+
+    def test_feed_merges_pushed_and_pulled_posts(self):
+        """Лента сливает разложенные и подмешанные посты по дате."""
+        posts = [
+            Post.objects.create(author=author, text=f'post {number}')
+            for number, author in enumerate(
+                (self.star, self.author) * POSTS_PER_PAGE
+            )
+        ]
+        expected = sorted(
+            posts,
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=True
+        )
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        first_page = response.context['page_obj']
+        self.assertEqual(list(first_page), expected[:POSTS_PER_PAGE])
+        response = self.follower_client.get(
+            reverse('posts:follow_index') + f'?cursor={first_page.cursor.next}'
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            expected[POSTS_PER_PAGE:2 * POSTS_PER_PAGE]
+        )
+
+    def test_backfill_all_skips_popular_authors(self):
+        """Массовое заполнение не раскладывает посты популярных авторов."""
+        Post.objects.create(author=self.star, text='star post')
+        own = Post.objects.create(author=self.author, text='author post')
+        TimelineEntry.objects.all().delete()
+        self.assertEqual(backfill_all(), 1)
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user_id', 'post_id')),
+            [(self.follower.pk, own.pk)]
+        )
+        self.assertEqual(backfill_all(), 0)
+
+    def test_crossing_limit_keeps_timeline_complete(self):
+        """Посты не теряются, когда автор пересекает порог в обе стороны."""
+        pulled_post = Post.objects.create(author=self.star, text='pulled')
+        Follow.objects.filter(user=self.fan, author=self.star).delete()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower,
+            post=pulled_post
+        ).exists())
+
+        Follow.objects.create(user=self.author, author=self.star)
+        second_post = Post.objects.create(author=self.star, text='second')
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=second_post).exists()
+        )
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        self.assertIn(second_post, response.context['page_obj'])
+
+        Follow.objects.filter(user=self.author, author=self.star).delete()
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.follower,
+                author=self.star
+            ).values_list('post_id', flat=True)),
+            {pulled_post.pk, second_post.pk}
+        )
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [second_post, pulled_post]
+        )
@@ -6,16 +6,29 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..constants import POSTS_PER_PAGE, POSTS_PER_SECOND_PAGE
-from ..models import Follow, Group, Post
+from ..constants import (COMMENTS_PER_PAGE, POSTS_PER_PAGE,
+                         POSTS_PER_SECOND_PAGE)
+from ..models import Comment, Follow, Group, PageStamp, Post
+from ..pagination import encode_cursor
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 User = get_user_model()
 
+# Токены, которые раскодируются, но не подходят курсору по дате.
+INVALID_CURSORS = (
+    (5, 1),
+    ('2020-01-01T00:00:00', 10 ** 30),
+    ('не дата', 1),
+    ('2020-01-01T00:00:00', True),
+    (None, 1),
+    (float('inf'), 1),
+)
+
 
 class PostsViewTests(TestCase):
     @classmethod
@@ -202,12 +215,12 @@ class PostsPagesTest(TestCase):
 
     def test_first_post_appeared_on_the_index_page(self):
         """Пост при создании попадает на 1ю позицию на главной странице."""
-        response = self.authorized_client.get(reverse('posts:index'))
         first_post = Post.objects.create(
             author=self.user,
             text='test post',
             group=self.group,
         )
+        response = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(response.context['page_obj'][0],
                          first_post)
 
@@ -238,10 +251,7 @@ class PostsPagesTest(TestCase):
     def test_index_cache(self):
         """Главная страница кэшируется"""
         response_first = self.authorized_client.get(reverse('posts:index'))
-        Post.objects.create(
-            author=self.user,
-            text='test post',
-        )
+        Post.objects.filter(pk=self.post.pk).update(text='changed text')
         response_second = self.authorized_client.get(
             (reverse('posts:index'))
         )
@@ -254,6 +264,46 @@ class PostsPagesTest(TestCase):
         self.assertNotEqual(response_first.content,
                             response_after_clear.content)
 
+    def test_index_cache_invalidated_by_new_post(self):
+        """Новый пост сразу сбрасывает кэш главной страницы."""
+        response_first = self.authorized_client.get(reverse('posts:index'))
+        Post.objects.create(
+            author=self.user,
+            text='brand new post',
+        )
+        response_second = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotEqual(response_first.content,
+                            response_second.content)
+        self.assertContains(response_second, 'brand new post')
+
+    def test_index_cache_keyed_by_stamp_in_database(self):
+        """Кэш главной сбрасывает отметка ленты в базе, общая для всех."""
+        response_first = self.authorized_client.get(reverse('posts:index'))
+        Post.objects.bulk_create([
+            Post(author=self.user, text='post without signals'),
+        ])
+        # Так изменение видит процесс, у которого свой кэш в памяти.
+        PageStamp.objects.filter(scope='feed').update(
+            version=F('version') + 1
+        )
+        response_second = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotEqual(response_first.content,
+                            response_second.content)
+        self.assertContains(response_second, 'post without signals')
+
+    def test_index_cache_keyed_by_page(self):
+        """Разные страницы ленты не отдают кэш первой страницы."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'bulk post {number}')
+            for number in range(POSTS_PER_PAGE)
+        )
+        first_page = self.authorized_client.get(reverse('posts:index'))
+        second_page = self.authorized_client.get(
+            reverse('posts:index') + '?page=2'
+        )
+        self.assertNotEqual(first_page.content, second_page.content)
+        self.assertContains(second_page, self.post.text)
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
@@ -324,6 +374,71 @@ class PaginatorViewsTest(TestCase):
                             (POSTS_PER_SECOND_PAGE),
                          )
 
+    def test_cursor_next_page_contains_three_records(self):
+        """Курсор следующей страницы ведёт к оставшимся постам."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        next_cursor = response.context['page_obj'].cursor.next
+        self.assertIsNotNone(next_cursor)
+        response = self.authorized_client.get(
+            reverse('posts:index') + f'?cursor={next_cursor}'
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), POSTS_PER_SECOND_PAGE)
+        self.assertIsNone(page_obj.cursor.next)
+        self.assertEqual(
+            list(page_obj),
+            list(Post.objects.order_by('-pub_date', '-pk')[POSTS_PER_PAGE:])
+        )
+
+    def test_cursor_previous_page_returns_first_page(self):
+        """Курсор предыдущей страницы возвращает к первой странице."""
+        first_page = self.authorized_client.get(
+            reverse('posts:index')
+        ).context['page_obj']
+        second_page = self.authorized_client.get(
+            reverse('posts:index') + f'?cursor={first_page.cursor.next}'
+        ).context['page_obj']
+        response = self.authorized_client.get(
+            reverse('posts:index') + f'?cursor={second_page.cursor.previous}'
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj), list(first_page))
+        self.assertIsNone(page_obj.cursor.previous)
+
+    def test_invalid_cursor_shows_first_page(self):
+        """Некорректный курсор показывает первую страницу."""
+        tokens = ['broken', *(
+            encode_cursor(*payload) for payload in INVALID_CURSORS
+        )]
+        for token in tokens:
+            with self.subTest(token=token):
+                response = self.authorized_client.get(
+                    reverse('posts:index') + f'?cursor={token}'
+                )
+                self.assertEqual(
+                    len(response.context['page_obj']),
+                    POSTS_PER_PAGE
+                )
+
+    def test_invalid_cursor_on_cursor_pages(self):
+        """Курсор не того типа не ломает ни одну курсорную страницу."""
+        pages = (
+            (reverse('posts:index'), {}),
+            (reverse('posts:group_list', args=[self.group.slug]), {}),
+            (reverse('posts:profile', args=[self.user.username]), {}),
+            (reverse('posts:follow_index'), {}),
+            (reverse('posts:search'), {'q': 'test'}),
+            (reverse('posts:comment_list', args=[self.posts[0].pk]), {}),
+        )
+        for url, params in pages:
+            for payload in INVALID_CURSORS:
+                with self.subTest(url=url, payload=payload):
+                    response = self.authorized_client.get(
+                        url,
+                        {**params, 'cursor': encode_cursor(*payload)}
+                    )
+                    self.assertEqual(response.status_code, 200)
+
 
 class SubscribeViewsTest(TestCase):
     @classmethod
@@ -400,3 +515,45 @@ class SubscribeViewsTest(TestCase):
             reverse('posts:follow_index')
         )
         self.assertFalse(response_no_follow_user.context['page_obj'])
+
+
+class CommentsPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_username')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='test post',
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'comment {number}')
+            for number in range(COMMENTS_PER_PAGE + POSTS_PER_SECOND_PAGE)
+        )
+
+    def test_post_detail_shows_first_comments_page(self):
+        """Страница поста выводит только первую пачку комментариев."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertIsNotNone(comments.cursor.next)
+        self.assertContains(response, 'Показать ещё комментарии')
+
+    def test_comment_list_fragment_returns_next_page(self):
+        """Фрагмент отдаёт следующую пачку комментариев."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        next_cursor = response.context['comments'].cursor.next
+        response = self.client.get(
+            reverse('posts:comment_list', kwargs={'post_id': self.post.id}),
+            {'cursor': next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        comments = response.context['comments']
+        self.assertEqual(len(comments), POSTS_PER_SECOND_PAGE)
+        self.assertIsNone(comments.cursor.next)
+        self.assertNotContains(response, 'Показать ещё комментарии')
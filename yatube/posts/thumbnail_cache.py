@@ -0,0 +1,198 @@
+import hashlib
+import os
+import re
+import threading
+import uuid
+
+from django.conf import settings
+
+from . import constants
+from .images import render_thumbnail
+from .storage import post_image_storage
+
+RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)')
+
+_evict_lock = threading.Lock()
+# Примерный размер каждого кэша в этом процессе: считается один раз
+# обходом каталога и дальше растёт с каждой записью.
+_totals = {}
+
+
+class DiskLRUCache:
+    """Кэш файлов на диске, ограниченный суммарным размером.
+
+    Время изменения файла служит отметкой последнего чтения. Размер
+    кэша ведётся счётчиком, и каталог обходится, только когда он
+    превысил max_bytes: тогда дольше всех не читанные файлы
+    удаляются, пока кэш не ужмётся до доли low_water от лимита.
+    Другие процессы счётчик не видят, он сверяется при каждом обходе.
+    """
+
+    def __init__(self, directory, max_bytes,
+                 low_water=constants.THUMBNAIL_DISK_CACHE_LOW_WATER):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Путь к файлу key или None, если его нет в кэше."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        return path
+
+    def set(self, key, content):
+        """Атомарно записывает content и при переполнении вытесняет."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(content)
+        os.replace(temp_path, path)
+        self.added(len(content))
+
+        return path
+
+    def delete(self, key):
+        """Удаляет файл key, если он есть в кэше."""
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    yield stat.st_mtime, stat.st_size, entry.path
+
+    def added(self, size):
+        """Учитывает записанный файл, вытесняет выше max_bytes."""
+        with _evict_lock:
+            total = _totals.get(self.directory)
+            if total is None:
+                total = sum(size for _, size, _ in self._entries())
+            else:
+                total += size
+            if total > self.max_bytes:
+                total = self.evict()
+            _totals[self.directory] = total
+
+    def evict(self):
+        """Удаляет давно не читанные файлы до нижней отметки.
+
+        Вызывается под _evict_lock, вернёт размер оставшихся файлов.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes * self.low_water:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        return total
+
+
+def get_disk_cache():
+    return DiskLRUCache(
+        settings.THUMBNAIL_DISK_CACHE_DIR,
+        settings.THUMBNAIL_DISK_CACHE_MAX_BYTES
+    )
+
+
+def thumbnail_version(size):
+    """Версия размера: меняется вместе с его геометрией и опциями."""
+    geometry, options = constants.THUMBNAIL_SIZES[size]
+    source = f'{geometry}:{sorted(options.items())}'
+
+    return hashlib.sha256(source.encode()).hexdigest()[:8]
+
+
+def thumbnail_key(name, modified, size, image_format):
+    """Ключ миниатюры: меняется вместе с картинкой и её размером.
+
+    Время изменения файла нужно для картинок, загруженных до
+    хранения по хэшу: их имя не зависит от содержимого.
+    """
+    source = f'{name}:{modified}:{thumbnail_version(size)}:{image_format}'
+
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def image_modified(name):
+    """Время изменения картинки в секундах, часть ключа миниатюры."""
+    return int(post_image_storage.get_modified_time(name).timestamp())
+
+
+def get_thumbnail_path(name, modified, size, image_format):
+    """Путь к миниатюре в дисковом кэше, создаёт её при промахе."""
+    disk_cache = get_disk_cache()
+    key = thumbnail_key(name, modified, size, image_format)
+    path = disk_cache.get(key)
+    if path is None:
+        path = disk_cache.set(key, render_thumbnail(name, size, image_format))
+
+    return path
+
+
+def build_thumbnails(name):
+    """Заранее кладёт в дисковый кэш миниатюры всех размеров и форматов.
+
+    Ключи те же, что считает posts:thumbnail, поэтому первый запрос
+    картинки не ждёт отрисовки. Уже удалённую картинку пропускает.
+    """
+    try:
+        modified = image_modified(name)
+    except FileNotFoundError:
+        return
+    for size in constants.THUMBNAIL_SIZES:
+        for image_format in constants.THUMBNAIL_FORMATS:
+            get_thumbnail_path(name, modified, size, image_format)
+
+
+def drop_thumbnails(name):
+    """Удаляет из дискового кэша все миниатюры картинки."""
+    disk_cache = get_disk_cache()
+    modified = image_modified(name)
+    for size in constants.THUMBNAIL_SIZES:
+        for image_format in constants.THUMBNAIL_FORMATS:
+            disk_cache.delete(
+                thumbnail_key(name, modified, size, image_format)
+            )
+
+
+def parse_range(header, length):
+    """Границы (start, end) единственного диапазона заголовка Range.
+
+    Вернёт None для отсутствующего, составного или нераспознанного
+    заголовка - тогда отдаётся весь файл. Для диапазона за пределами
+    файла выбрасывает ValueError.
+    """
+    match = RANGE_RE.fullmatch(header.strip()) if header else None
+    if match is None or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        suffix = int(end)
+        if not suffix:
+            raise ValueError('Пустой диапазон.')
+        return max(length - suffix, 0), length - 1
+    start = int(start)
+    end = min(int(end), length - 1) if end else length - 1
+    if start >= length or start > end:
+        raise ValueError('Диапазон за пределами файла.')
+
+    return start, end
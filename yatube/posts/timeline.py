@@ -0,0 +1,257 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+
+from . import constants
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .pagination import CursorPaginator
+
+PULLED_AUTHORS_CACHE_KEY = 'timeline:pulled_authors'
+
+BACKFILL_SQL = '''
+    {insert} posts_timelineentry (user_id, post_id, author_id, pub_date)
+    SELECT follow.user_id, post.id, post.author_id, post.pub_date
+    FROM posts_follow AS follow
+    JOIN posts_post AS post ON post.author_id = follow.author_id
+    WHERE {where}{suffix}
+'''
+
+
+def _bulk_insert(entries):
+    """Вставляет записи ленты пачками, не держа их все в памяти."""
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, constants.TIMELINE_BATCH_SIZE))
+        if not batch:
+            break
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _insert_from_follows(where, params):
+    """Одним запросом раскладывает посты по подпискам из where.
+
+    Записи, которые уже есть в лентах, пропускаются. Вернёт число
+    вставленных записей.
+    """
+    sql = BACKFILL_SQL.format(
+        insert=connection.ops.insert_statement(ignore_conflicts=True),
+        where=where,
+        suffix=connection.ops.ignore_conflicts_suffix_sql(
+            ignore_conflicts=True
+        ),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def get_pulled_author_ids():
+    """Авторы, чьи посты подмешиваются в ленту при чтении.
+
+    Это авторы, у которых подписчиков больше порога
+    TIMELINE_FANOUT_FOLLOWER_LIMIT: раскладка их постов по лентам
+    слишком дорога на запись.
+    """
+    author_ids = cache.get(PULLED_AUTHORS_CACHE_KEY)
+    if author_ids is None:
+        author_ids = frozenset(
+            AuthorStats.objects.filter(
+                follower_count__gt=settings.TIMELINE_FANOUT_FOLLOWER_LIMIT
+            ).values_list('user_id', flat=True)
+        )
+        cache.set(
+            PULLED_AUTHORS_CACHE_KEY,
+            author_ids,
+            constants.PULLED_AUTHORS_CACHE_SECONDS
+        )
+
+    return author_ids
+
+
+def is_pulled(author_id):
+    """Подмешивается ли автор при чтении, по счётчику в базе.
+
+    Запись решает по базе, а не по кэшу get_pulled_author_ids:
+    иначе после пересечения порога устаревший кэш пропустил бы
+    раскладку, которую rebalance_author уже не повторит.
+    """
+    return AuthorStats.objects.filter(
+        user_id=author_id,
+        follower_count__gt=settings.TIMELINE_FANOUT_FOLLOWER_LIMIT
+    ).exists()
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост в ленты подписчиков автора."""
+    if is_pulled(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in follower_ids.iterator()
+    )
+
+
+def backfill_follow(user_id, author_id):
+    """Добавляет в ленту подписчика уже опубликованные посты автора."""
+    if is_pulled(author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts.iterator()
+    )
+
+
+def rebalance_author(author_id):
+    """Приводит ленты в порядок после пересечения автором порога.
+
+    Пока автор подмешивался при чтении, его новые посты и подписки
+    на него в ленты не попадали. Вернувшись под порог, он заново
+    раскладывается по лентам всех подписчиков. Поднявшись над
+    порогом, он начинает подмешиваться, как только сброшен кэш.
+    """
+    cache.delete(PULLED_AUTHORS_CACHE_KEY)
+    if is_pulled(author_id):
+        return 0
+
+    return _insert_from_follows('follow.author_id = %s', [author_id])
+
+
+def backfill_all():
+    """Заполняет ленты по всем подпискам одним INSERT ... SELECT.
+
+    Популярные авторы пропускаются: их посты подмешиваются при
+    чтении. Вернёт число вставленных записей.
+    """
+    return _insert_from_follows(
+        'follow.author_id NOT IN ('
+        'SELECT user_id FROM posts_authorstats WHERE follower_count > %s)',
+        [settings.TIMELINE_FANOUT_FOLLOWER_LIMIT]
+    )
+
+
+def prune_follow(user_id, author_id):
+    """Убирает из ленты подписчика посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        author_id=author_id
+    ).delete()
+
+
+def get_following_posts(user):
+    """Все посты авторов, на которых подписан пользователь."""
+    return Post.objects.filter(
+        author__following__user=user
+    ).select_related(
+        'author',
+        'group'
+    )
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорный пагинатор ленты подписок.
+
+    Страница собирается k-way слиянием по дате из материализованной
+    ленты и постов популярных авторов, которые читаются напрямую.
+    С fields страница состоит из словарей только с этими полями.
+    """
+
+    def __init__(self, object_list, per_page, user, fields=None, **kwargs):
+        kwargs.setdefault('order_field', 'feed_date')
+        kwargs.setdefault('tiebreak_field', 'feed_id')
+        super().__init__(object_list, per_page, **kwargs)
+        self.user = user
+        self.fields = fields
+
+    def get_order_field(self):
+        # feed_date - аннотация с датой поста в ленте.
+        return TimelineEntry._meta.get_field('pub_date')
+
+    def _project(self, queryset):
+        if self.fields is None:
+            return queryset
+
+        return queryset.values(
+            *self.fields,
+            self.order_field,
+            self.tiebreak_field
+        )
+
+    def get_sources(self):
+        """QuerySet'ы разложенной и подмешиваемой частей ленты."""
+        pulled_ids = get_pulled_author_ids()
+        if pulled_ids:
+            pulled_ids = list(Follow.objects.filter(
+                user=self.user,
+                author_id__in=pulled_ids
+            ).values_list('author_id', flat=True))
+        pushed = Post.objects.filter(
+            timeline_entries__user=self.user
+        ).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_id=F('timeline_entries__post_id')
+        ).select_related(
+            'author',
+            'group'
+        )
+        if not pulled_ids:
+            return [self._project(pushed)]
+        pulled = Post.objects.filter(
+            author_id__in=pulled_ids
+        ).annotate(
+            feed_date=F('pub_date'),
+            feed_id=F('pk')
+        ).select_related(
+            'author',
+            'group'
+        )
+
+        return [
+            self._project(pushed.exclude(author_id__in=pulled_ids)),
+            self._project(pulled),
+        ]
+
+    def fetch_window(self, cursor, limit):
+        reverse = bool(cursor and cursor[2])
+        sources = [
+            self.window_queryset(cursor, queryset)[:limit]
+            for queryset in self.get_sources()
+        ]
+        if len(sources) == 1:
+            return list(sources[0])
+        merged = heapq.merge(
+            *sources,
+            key=self.position,
+            reverse=not reverse
+        )
+        items = []
+        seen = set()
+        for post in merged:
+            # feed_id - это id поста в обоих источниках.
+            post_id = self.position(post)[1]
+            if post_id not in seen:
+                seen.add(post_id)
+                items.append(post)
+            if len(items) == limit:
+                break
+
+        return items
@@ -1,18 +1,46 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('rss/', feeds.LatestPostsFeed(), name='index_rss'),
+    path('atom/', feeds.LatestPostsAtomFeed(), name='index_atom'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/rss/',
+         feeds.GroupPostsFeed(),
+         name='group_rss'
+         ),
+    path('group/<slug:slug>/atom/',
+         feeds.GroupPostsAtomFeed(),
+         name='group_atom'
+         ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/rss/',
+         feeds.ProfilePostsFeed(),
+         name='profile_rss'
+         ),
+    path('profile/<str:username>/atom/',
+         feeds.ProfilePostsAtomFeed(),
+         name='profile_atom'
+         ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/comments/',
+         views.comment_list,
+         name='comment_list'
+         ),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'
          ),
+    path('search/', views.search, name='search'),
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
+    path('thumbnails/<str:size>/<str:version>/<path:name>',
+         views.thumbnail,
+         name='thumbnail'
+         ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('follow/', views.follow_index, name='follow_index'),
@@ -1,12 +1,38 @@
 from django.core.paginator import Paginator
 
 from . import constants
+from .pagination import CursorPaginator
 
 
-def get_page_context(post_list, request):
-    """Пагинация для шаблонов страниц."""
-    paginator = Paginator(post_list, constants.POSTS_PER_PAGE)
+def get_page_context(post_list, request, paginator_class=CursorPaginator,
+                     **paginator_kwargs):
+    """Пагинация для шаблонов страниц.
+
+    По умолчанию страницы листаются курсором, номерная пагинация
+    с COUNT(*) включается только явным параметром ?page=.
+    """
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if page_number is not None:
+        paginator = Paginator(post_list, constants.POSTS_PER_PAGE)
+
+        return paginator.get_page(page_number)
+
+    paginator = paginator_class(
+        post_list,
+        constants.POSTS_PER_PAGE,
+        **paginator_kwargs
+    )
+    page_obj = paginator.get_cursor_page(request.GET.get('cursor'))
 
     return page_obj
+
+
+def get_comments_page(post, cursor=None):
+    """Страница комментариев поста с авторами, загруженными одним JOIN."""
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        constants.COMMENTS_PER_PAGE,
+        order_field='created'
+    )
+
+    return paginator.get_cursor_page(cursor)
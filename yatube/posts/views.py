@@ -1,76 +1,297 @@
+import hashlib
+import os
+import time
+
 from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
 
+from . import constants
+from .autocomplete import suggest
+from .feed_cache import SITE, get_watermark
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-from .utils import get_page_context
+from .search import SearchPaginator
+from .storage import post_image_storage
+from .thumbnail_cache import (
+    get_thumbnail_path,
+    image_modified,
+    parse_range,
+    thumbnail_key,
+    thumbnail_version,
+)
+from .timeline import TimelinePaginator, get_following_posts
+from .utils import get_comments_page, get_page_context
 
 
 def index(request):
     """Выводит шаблон главной страницы."""
-    post_list = Post.objects.select_related(
-        'author',
-        'group'
+    def get_context():
+        post_list = Post.objects.select_related(
+            'author',
+            'group'
+        )
+
+        return {
+            'page_obj': get_page_context(post_list, request),
+            'cache_timeout': constants.CASH_TIME_FOR_INDEX_PAGE_IN_SECONDS,
+        }
+
+    return _render_conditional(
+        request,
+        'posts/index.html',
+        get_context,
+        (SITE, 'feed')
     )
-    page_obj = get_page_context(post_list, request)
-    context = {
-        'page_obj': page_obj,
-    }
-
-    return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
     """Выводит шаблон с постами группы."""
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author').all()
-    page_obj = get_page_context(post_list, request)
-    context = {
-        'group': group,
-        'page_obj': page_obj,
-    }
 
-    return render(request, 'posts/group_list.html', context)
+    def get_context():
+        post_list = group.posts.select_related('author').all()
+
+        return {
+            'group': group,
+            'page_obj': get_page_context(post_list, request),
+        }
+
+    return _render_conditional(
+        request,
+        'posts/group_list.html',
+        get_context,
+        (SITE, f'group:{group.pk}')
+    )
 
 
 def profile(request, username):
     """Выводит страницу профиля пользователя."""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    page_obj = get_page_context(post_list, request)
-    following = None
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=author
-        ).exists()
-    context = {
-        'author': author,
-        'page_obj': page_obj,
-        'followind': following,
-    }
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
 
-    return render(request, 'posts/profile.html', context)
+    def get_context():
+        post_list = author.posts.select_related('group')
+        following = None
+        if request.user.is_authenticated:
+            following = Follow.objects.filter(
+                user=request.user,
+                author=author
+            ).exists()
+
+        return {
+            'author': author,
+            'page_obj': get_page_context(post_list, request),
+            'followind': following,
+        }
+
+    return _render_conditional(
+        request,
+        'posts/profile.html',
+        get_context,
+        (SITE, f'author:{author.pk}')
+    )
 
 
 def post_detail(request, post_id):
     """Выводит страницу отдельно взятого поста."""
     post_object = get_object_or_404(Post.objects.select_related(
         'group',
-        'author'),
+        'author',
+        'author__stats'),
         id=post_id
     )
-    comments = post_object.comments.all()
-    form = CommentForm(
-        request.POST or None
+
+    def get_context():
+        return {
+            'post': post_object,
+            'comments': get_comments_page(
+                post_object,
+                request.GET.get('comments')
+            ),
+            'form': CommentForm(request.POST or None),
+        }
+
+    return _render_conditional(
+        request,
+        'posts/post_detail.html',
+        get_context,
+        (SITE, f'post:{post_object.pk}', f'author:{post_object.author_id}')
+    )
+
+
+def _render_conditional(request, template, get_context, scopes):
+    """Ответ 304, если страница не менялась, иначе отрисованный шаблон.
+
+    ETag и Last-Modified строятся из отметок областей в базе и
+    пользователя, для которого рисуется страница, поэтому проверка
+    не выбирает строки страницы и не трогает шаблон. Те же отметки
+    попадают в контекст как page_version для ключей кэша фрагментов:
+    в отличие от кэша процесса, база общая для всех процессов.
+    """
+    version, modified = get_watermark(*scopes)
+    # Время изменения отличает версию от такой же после отката базы.
+    page_version = f'{version}:{modified.isoformat() if modified else ""}'
+    validator = ':'.join(str(part) for part in (
+        request.user.pk,
+        *scopes,
+        page_version,
+    ))
+    etag = f'"{hashlib.md5(validator.encode()).hexdigest()}"'
+    # Last-Modified точен до секунды: пока секунда последнего
+    # изменения не закончилась, следующее изменение его не сдвинет,
+    # и ответ на If-Modified-Since оказался бы устаревшим.
+    last_modified = None
+    if modified and int(modified.timestamp()) < int(time.time()):
+        last_modified = int(modified.timestamp())
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
     )
+    if response is None:
+        context = get_context()
+        context['page_version'] = page_version
+        response = render(request, template, context)
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Страница зависит от пользователя и должна перепроверяться
+    # при каждом открытии, а не браться из кэша по эвристике.
+    patch_cache_control(response, private=True, no_cache=True)
+
+    return response
+
+
+def comment_list(request, post_id):
+    """Отдаёт фрагмент со следующей пачкой комментариев поста."""
+    post_object = get_object_or_404(Post.objects.only('id'), id=post_id)
+    comments = get_comments_page(post_object, request.GET.get('cursor'))
     context = {
         'post': post_object,
         'comments': comments,
-        'form': form,
     }
 
-    return render(request, 'posts/post_detail.html', context)
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
+def search(request):
+    """Выводит шаблон с результатами полнотекстового поиска."""
+    query = request.GET.get('q', '').strip()
+    paginator = SearchPaginator(
+        Post.objects.select_related('author', 'group'),
+        constants.POSTS_PER_PAGE,
+        query=query
+    )
+    context = {
+        'page_obj': paginator.get_cursor_page(request.GET.get('cursor')),
+        'query': query,
+    }
+
+    return render(request, 'posts/search.html', context)
+
+
+@require_safe
+def autocomplete(request):
+    """Подсказки авторов и групп по началу ввода в JSON."""
+    response = JsonResponse(suggest(request.GET.get('q', '')))
+    patch_cache_control(
+        response,
+        max_age=constants.AUTOCOMPLETE_CLIENT_CACHE_SECONDS
+    )
+
+    return response
+
+
+@require_safe
+def thumbnail(request, size, version, name):
+    """Отдаёт миниатюру картинки поста из дискового кэша.
+
+    Кэш заранее наполняет задача build_thumbnails, а при промахе
+    миниатюра создаётся здесь же.
+
+    В адресе есть версия размера, а имя картинки по хэшу содержимого
+    меняется вместе с файлом, поэтому такой ответ кэшируется
+    бессрочно. Миниатюры картинок со старыми именами браузер
+    перепроверяет по ETag.
+    """
+    if size not in constants.THUMBNAIL_SIZES:
+        raise Http404('Неизвестный размер миниатюры.')
+    if version != thumbnail_version(size):
+        return redirect(
+            'posts:thumbnail',
+            size,
+            thumbnail_version(size),
+            name
+        )
+    if not Post.objects.filter(image=name).exists():
+        raise Http404('Картинка не найдена.')
+    accepts_webp = 'image/webp' in request.META.get('HTTP_ACCEPT', '')
+    image_format = 'WEBP' if accepts_webp else 'JPEG'
+    try:
+        last_modified = image_modified(name)
+    except FileNotFoundError:
+        raise Http404('Файл картинки не найден.')
+    key = thumbnail_key(name, last_modified, size, image_format)
+    etag = f'"{key[:32]}"'
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+    if response is None:
+        path = get_thumbnail_path(name, last_modified, size, image_format)
+        response = _range_response(
+            request,
+            path,
+            f'image/{image_format.lower()}',
+            etag
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Vary'] = 'Accept'
+    if post_image_storage.is_content_addressed(name):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=constants.THUMBNAIL_MAX_AGE,
+            immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+
+    return response
+
+
+def _range_response(request, path, content_type, etag):
+    """Весь файл или его часть по заголовку Range."""
+    length = os.path.getsize(path)
+    header = request.META.get('HTTP_RANGE')
+    # If-Range с устаревшим ETag означает запрос всего файла.
+    if request.META.get('HTTP_IF_RANGE', etag) != etag:
+        header = None
+    try:
+        byte_range = parse_range(header, length)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{length}'
+        return response
+    if byte_range is None:
+        return FileResponse(open(path, 'rb'), content_type=content_type)
+    start, end = byte_range
+    with open(path, 'rb') as file:
+        file.seek(start)
+        content = file.read(end - start + 1)
+    response = HttpResponse(content, status=206, content_type=content_type)
+    response['Content-Range'] = f'bytes {start}-{end}/{length}'
+
+    return response
 
 
 @login_required
@@ -143,8 +364,13 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """Покажет страницу с постами авторов, на которых подписан пользователь."""
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_page_context(post_list, request)
+    post_list = get_following_posts(request.user)
+    page_obj = get_page_context(
+        post_list,
+        request,
+        paginator_class=TimelinePaginator,
+        user=request.user
+    )
     context = {
         'page_obj': page_obj,
     }
@@ -156,13 +382,8 @@ def follow_index(request):
 def profile_follow(request, username):
     """Подписка на автора."""
     author_object = get_object_or_404(User, username=username)
-    if request.user == author_object or Follow.objects.filter(
-            user=request.user,
-            author=author_object
-    ).exists():
-        return redirect('posts:follow_index')
-    new_follow = Follow(user=request.user, author=author_object)
-    new_follow.save()
+    if request.user != author_object:
+        Follow.objects.get_or_create(user=request.user, author=author_object)
 
     return redirect('posts:follow_index')
 
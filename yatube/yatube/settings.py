@@ -34,10 +34,10 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'about.apps.AboutConfig',
-    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -124,6 +124,11 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки всегда пишутся во временный файл, а не держатся в памяти.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -132,6 +137,64 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Учёт SQL-запросов: повтор одного запроса столько раз считается
+# признаком N+1, бюджеты задаются по имени представления.
+SQL_N_PLUS_ONE_THRESHOLD = 5
+SQL_QUERY_BUDGETS = {
+    'posts:index': 10,
+    'posts:group_list': 10,
+    'posts:profile': 10,
+    'posts:post_detail': 10,
+    'posts:follow_index': 10,
+    'posts:search': 10,
+    'posts:autocomplete': 3,
+    'posts:thumbnail': 1,
+    'posts:index_rss': 3,
+    'posts:index_atom': 3,
+    'posts:group_rss': 3,
+    'posts:group_atom': 3,
+    'posts:profile_rss': 3,
+    'posts:profile_atom': 3,
+    'api_v1:posts': 1,
+    'api_v1:follow': 6,
+    'api_v1:group_posts': 2,
+    'api_v1:profile_posts': 2,
+}
+SQL_QUERY_BUDGET_ENFORCE = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # INFO пишет статистику каждого запроса, WARNING - только
+        # превышения бюджета и подозрения на N+1.
+        'yatube.sql': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Потоки веб-процесса, выполняющие фоновые задачи после ответа,
+# 0 - выполнять задачи сразу в потоке запроса. Отложенные и
+# повторяемые задачи выполняет команда run_tasks.
+TASK_QUEUE_WORKERS = 2
+
+# Дисковый кэш миниатюр, которые отдаёт posts:thumbnail. При
+# переполнении удаляются дольше всех не запрашивавшиеся файлы.
+THUMBNAIL_DISK_CACHE_DIR = os.path.join(BASE_DIR, 'thumbnail_cache')
+THUMBNAIL_DISK_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Авторы с большим числом подписчиков не раскладываются по лентам
+# при публикации, а подмешиваются в ленту при чтении.
+TIMELINE_FANOUT_FOLLOWER_LIMIT = 1000
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
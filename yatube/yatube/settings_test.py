@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+from .settings import *  # noqa: F401, F403
+
+# Тесты идут внутри транзакций, которые откатываются, и с базой в
+# памяти, которую не видят другие потоки. Поэтому фоновые задачи
+# выполняются сразу в потоке запроса.
+TASK_QUEUE_WORKERS = 0
+
+# Сохранение поста с картинкой сразу наполняет дисковый кэш миниатюр,
+# он не должен оставаться в каталоге проекта.
+THUMBNAIL_DISK_CACHE_DIR = os.path.join(
+    tempfile.gettempdir(),
+    'yatube_test_thumbnail_cache'
+)